@@ -1,7 +1,7 @@
 import numpy as np
 from scipy.sparse.csgraph import laplacian
 from openpnm.algorithms import ReactiveTransport
-from openpnm.utils import logging
+from openpnm.utils import logging, profiled
 logger = logging.getLogger(__name__)
 
 
@@ -57,6 +57,7 @@ class AdvectionDiffusion(ReactiveTransport):
             self.settings['s_scheme'] = s_scheme
         super().setup(**kwargs)
 
+    @profiled
     def _build_A(self, force=False):
         s_dis = self.settings['s_scheme']
         network = self.project.network
@@ -126,6 +127,7 @@ class AdvectionDiffusion(ReactiveTransport):
             self['pore.bc_outflow'] = np.nan
         self['pore.bc_outflow'][pores] = Qp[pores]
 
+    @profiled
     def _apply_BCs(self):
         # Apply Dirichlet and rate BCs
         ReactiveTransport._apply_BCs(self)
@@ -71,3 +71,16 @@ class GenericAlgorithm(Base):
         r"""
         """
         raise NotImplementedError("This method must be subclassed")
+
+    def _get_network_stamp(self, props):
+        r"""
+        Returns a tuple that identifies the current state of the given
+        properties on the network and its geometries, so that data derived
+        from them can be cached and rebuilt only when they change.
+        """
+        net = self.project.network
+        sources = [net] + list(self.project.geometries().values())
+        stamp = [(id(item), id(item.get(prop)), item._get_version(prop))
+                 for item in sources for prop in props]
+        stamp.append((net.Np, net.Nt))
+        return tuple(stamp)
@@ -1,13 +1,12 @@
 import importlib
 import numpy as np
 import scipy.sparse as sprs
-import scipy.sparse.csgraph as spgr
 from scipy.spatial import ConvexHull
 from scipy.spatial import cKDTree
 from decimal import Decimal as dc
 from openpnm.topotools import iscoplanar
 from openpnm.algorithms import GenericAlgorithm
-from openpnm.utils import logging
+from openpnm.utils import logging, profiled
 logger = logging.getLogger(__name__)
 
 # Set some default settings
@@ -20,6 +19,9 @@ def_set = {'phase': None,
            'solver_atol': 1e-6,
            'solver_rtol': 1e-6,
            'solver_maxiter': 5000,
+           'cache_solver': True,
+           'warm_start': False,
+           'matrix_free': False,
            'gui': {'setup':        {'quantity': '',
                                     'conductance': ''},
                    'set_rate_BC':  {'pores': None,
@@ -130,11 +132,20 @@ class GenericTransport(GenericAlgorithm):
         # Create some instance attributes
         self._A = None
         self._pure_A = None
+        self._BC_masks = None
+        self._solver_cache = None
         self._b = None
         self._pure_b = None
         self['pore.bc_rate'] = np.nan
         self['pore.bc_value'] = np.nan
 
+    def __getstate__(self):
+        # Factorized solvers such as SuperLU cannot be pickled, and are
+        # easily rebuilt when next needed
+        state = super().__getstate__()
+        state['_solver_cache'] = None
+        return state
+
     def setup(self, phase=None, quantity='', conductance='', **kwargs):
         r"""
         This method takes several arguments that are essential to running the
@@ -185,6 +196,23 @@ class GenericTransport(GenericAlgorithm):
             Limits the number of iterations to attempt before quiting when
             aiming for the specified tolerance. The default is 5000.
 
+        cache_solver : boolean
+            If ``True`` (default) the LU factorization used by ``spsolve``, or
+            the AMG hierarchy used by ``pyamg``, is kept and reused as long as
+            the **A** matrix does not change.
+
+        warm_start : boolean
+            If ``True`` the iterative solvers start from the present value of
+            ``quantity`` rather than from zeros.  The default is ``False``.
+
+        matrix_free : boolean
+            If ``True`` the **A** matrix is never assembled.  Instead it is a
+            ``LaplacianOperator`` that computes products with *x* directly
+            from 'throat.conns' and the conductances, which requires one of
+            the iterative solvers of the ``scipy`` family.  If
+            ``solver_preconditioner`` is 'jacobi' the diagonal of **A** is
+            used as the preconditioner.  The default is ``False``.
+
         """
         if phase:
             self.settings['phase'] = phase.name
@@ -315,6 +343,7 @@ class GenericTransport(GenericAlgorithm):
         if 'pore.bc_rate' in self.keys():
             self['pore.bc_rate'][pores] = np.nan
 
+    @profiled
     def _build_A(self, force=False):
         r"""
         Builds the coefficient matrix based on conductances between pores.
@@ -329,16 +358,80 @@ class GenericTransport(GenericAlgorithm):
             ``False`` (the default), a cached version of A is returned.  The
             cached version is *clean* in the sense that no boundary conditions
             or sources terms have been added to it.
+
+        Notes
+        -----
+        Unless ``matrix_free`` is set, the matrix is assembled in CSR format
+        by ``_assemble_laplacian``, and it is still in CSR format once the
+        boundary conditions have been applied by ``_apply_BCs``.
         """
-        if force:
-            self._pure_A = None
-        if self._pure_A is None:
+        matrix_free = bool(self.settings['matrix_free'])
+        if force or (self._pure_A is None) or \
+                (isinstance(self._pure_A, LaplacianOperator) != matrix_free):
             network = self.project.network
             phase = self.project.phases()[self.settings['phase']]
             g = phase[self.settings['conductance']]
-            am = network.create_adjacency_matrix(weights=g, fmt='coo')
-            self._pure_A = spgr.laplacian(am)
+            if matrix_free:
+                self._pure_A = LaplacianOperator(network['throat.conns'], g,
+                                                 Np=network.Np)
+            else:
+                self._pure_A = self._assemble_laplacian(network, g,
+                                                        self._pure_A)
         self.A = self._pure_A.copy()
+        if hasattr(self._pure_A, '_pattern'):
+            self.A._pattern = self._pure_A._pattern
+
+    def _assemble_laplacian(self, network, g, A=None):
+        r"""
+        Assembles the Laplacian matrix of the network weighted by the given
+        throat conductances, using the sparsity pattern stored on the network.
+
+        Parameters
+        ----------
+        network : OpenPNM Network object
+            The network whose topology defines the matrix
+
+        g : ND-array
+            The throat conductances, which can be Nt-long for symmetric
+            conductances or 2*Nt-long (or Nt-by-2) for asymmetric ones, with
+            the same meaning as in ``create_adjacency_matrix``.
+
+        A : CSR sparse matrix, optional
+            A matrix previously returned by this method.  If it still matches
+            the network's pattern its ``data`` array is overwritten in-place
+            rather than allocating a new matrix.
+
+        Returns
+        -------
+        The Laplacian matrix in CSR format
+
+        """
+        pattern = network._get_laplacian_pattern()
+        Np, Nt = network.Np, network.Nt
+        g = np.array(g)
+        if g.shape == (Nt, 2):
+            g = g.flatten(order='F')
+        if g.shape == (Nt, ):
+            g = np.append(g, g)
+        elif g.shape != (2*Nt, ):
+            raise Exception('Received conductances are of incorrect length')
+        # The diagonal holds the column sums of the adjacency matrix
+        conns = network['throat.conns']
+        diag = np.bincount(conns[:, 1], weights=g[:Nt], minlength=Np) + \
+            np.bincount(conns[:, 0], weights=g[Nt:], minlength=Np)
+        vals = np.concatenate((-g, diag))
+        nnz = pattern['indices'].size
+        data = np.bincount(pattern['map'], weights=vals, minlength=nnz)
+        data = data.astype(g.dtype, copy=False)  # Keep type, as laplacian does
+        if sprs.isspmatrix_csr(A) and (A.nnz == nnz) and \
+                (A.dtype == data.dtype) and \
+                (getattr(A, '_pattern', None) == pattern['stamp']):
+            A.data[:] = data
+        else:
+            A = sprs.csr_matrix((data, pattern['indices'].copy(),
+                                 pattern['indptr'].copy()), shape=(Np, Np))
+            A._pattern = pattern['stamp']
+        return A
 
     def _build_b(self, force=False):
         r"""
@@ -381,35 +474,149 @@ class GenericTransport(GenericAlgorithm):
 
     b = property(fget=_get_b, fset=_set_b)
 
+    @profiled
     def _apply_BCs(self):
         r"""
         Applies all the boundary conditions that have been specified, by
         adding values to the *A* and *b* matrices.
+
+        Notes
+        -----
+        The reduced *A* is a CSR matrix kept on the object.  Its sparsity
+        pattern is found by ``_get_BC_masks`` once per set of BC locations and
+        reused until either the BC locations or the sparsity pattern of *A*
+        change, so repeated calls during Picard iterations or time steps only
+        rewrite its data array in-place.
         """
         if 'pore.bc_rate' in self.keys():
             # Update b
             ind = np.isfinite(self['pore.bc_rate'])
             self.b[ind] = self['pore.bc_rate'][ind]
         if 'pore.bc_value' in self.keys():
-            f = np.abs(self.A.data).mean()
-            # Update b (impose bc values)
-            ind = np.isfinite(self['pore.bc_value'])
-            self.b[ind] = self['pore.bc_value'][ind] * f
-            # Update b (substract quantities from b to keep A symmetric)
-            x_BC = np.zeros(self.b.shape)
-            x_BC[ind] = self['pore.bc_value'][ind]
-            self.b[~ind] -= (self.A.tocsr() * x_BC)[~ind]
-            # Update A
-            P_bc = self.toindices(ind)
-            indrow = np.isin(self.A.row, P_bc)
-            indcol = np.isin(self.A.col, P_bc)
-            self.A.data[indrow] = 0  # Remove entries from A for all BC rows
-            self.A.data[indcol] = 0  # Remove entries from A for all BC cols
-            datadiag = self.A.diagonal()  # Add diagonal entries back into A
-            datadiag[P_bc] = np.ones_like(P_bc, dtype=np.float64) * f
-            self.A.setdiag(datadiag)
-            self.A.eliminate_zeros()  # Remove 0 entries
+            self.A = self._apply_value_BCs(self.A, self.b,
+                                           self['pore.bc_value'])
+
+    def _apply_value_BCs(self, A, b, values):
+        r"""
+        Imposes value BCs on the given coefficient matrix and RHS.
+
+        Parameters
+        ----------
+        A : CSR sparse matrix or LaplacianOperator
+            The coefficient matrix, which is left unchanged unless it is a
+            ``LaplacianOperator``
+
+        b : ND-array
+            The RHS, which is updated in-place.  It is Np long or, to impose
+            several sets of BCs at once, Np-by-k.
 
+        values : ND-array
+            The BC values with ``nan`` in the pores without a value BC, in
+            the same shape as *b*.  When there are several columns they must
+            all have their value BCs in the same pores.
+
+        Returns
+        -------
+        The coefficient matrix with the value BCs applied.  For a CSR matrix
+        this is the reduced matrix stored on the object, which is rewritten
+        by the next call.
+        """
+        ind = np.isfinite(values)
+        if ind.ndim == 2:
+            ind = ind[:, 0]
+        if isinstance(A, LaplacianOperator):
+            f = A.mean_abs()
+        else:
+            A = A.tocsr()
+            f = np.abs(A.data).mean()
+        # Update b (impose bc values)
+        x_BC = np.zeros(b.shape)
+        x_BC[ind] = values[ind]
+        b[ind] = x_BC[ind] * f
+        # Update b (substract quantities from b to keep A symmetric)
+        b[~ind] -= (A * x_BC)[~ind]
+        if isinstance(A, LaplacianOperator):
+            A.eliminate(ind, f)
+            return A
+        # Update A by keeping only the entries outside BC rows and cols,
+        # plus the diagonal, then put f on the diagonal of the BC rows
+        masks = self._get_BC_masks(A, ind)
+        out = masks['A']
+        out.data[masks['pos']] = A.data[masks['keep']]
+        out.data[masks['new']] = 0.0
+        out.data[masks['diag']] = f
+        return out
+
+    def _get_BC_masks(self, A, ind):
+        r"""
+        Finds which entries of the given matrix are retained when value BCs
+        are applied at the given locations, and where they go in the reduced
+        matrix.
+
+        Parameters
+        ----------
+        A : CSR sparse matrix
+            The coefficient matrix to which the BCs are to be applied
+
+        ind : boolean ND-array
+            An Np-long mask that is ``True`` at the locations of value BCs
+
+        Returns
+        -------
+        A dictionary containing the reduced matrix ``'A'``, a ``'keep'``
+        mask into ``A.data`` with the ``'pos'`` of the kept entries in the
+        data array of the reduced matrix, the positions ``'new'`` of the
+        diagonal entries that are missing from ``A``, and ``'diag'``, the
+        positions of the diagonal entries of the BC rows.
+
+        Notes
+        -----
+        The reduced matrix always holds every diagonal entry, so source terms
+        can be added with ``setdiag`` without changing its sparsity pattern.
+        If ``A`` carries the ``_pattern`` stamp of ``_assemble_laplacian``,
+        the result is stored on the object and returned directly on later
+        calls with the same stamp and BC locations, and only the data array
+        of the reduced matrix is rewritten by ``_apply_value_BCs``.
+        """
+        stamp = getattr(A, '_pattern', None)
+        masks = self._BC_masks
+        if (stamp is not None) and (masks is not None) and \
+                (masks['stamp'] == (stamp, A.shape, A.nnz)) and \
+                (masks['A'].nnz == masks['pos'].size + masks['new'].size) \
+                and np.array_equal(masks['ind'], ind):
+            return masks
+        N = A.shape[0]
+        rows = np.repeat(np.arange(N), np.diff(A.indptr))
+        cols = A.indices
+        isdiag = rows == cols
+        keep = (~ind[rows] & ~ind[cols]) | isdiag
+        # Rows without a diagonal entry get an explicit one
+        missing = np.ones(N, dtype=bool)
+        missing[rows[isdiag]] = False
+        missing = np.where(missing)[0]
+        r = np.concatenate((rows[keep], missing))
+        c = np.concatenate((cols[keep], missing))
+        order = np.lexsort((c, r))
+        pos = np.empty_like(order)
+        pos[order] = np.arange(order.size)
+        indptr = np.zeros(N + 1, dtype=A.indptr.dtype)
+        indptr[1:] = np.cumsum(np.bincount(r, minlength=N))
+        out = sprs.csr_matrix((np.zeros(r.size, dtype=A.dtype),
+                               c[order].astype(A.indices.dtype), indptr),
+                              shape=A.shape)
+        Nkeep = np.sum(keep)
+        masks = {'stamp': (stamp, A.shape, A.nnz),
+                 'ind': ind.copy(),
+                 'A': out,
+                 'keep': keep,
+                 'pos': pos[:Nkeep],
+                 'new': pos[Nkeep:],
+                 'diag': pos[(r == c) & ind[r]]}
+        if stamp is not None:
+            self._BC_masks = masks
+        return masks
+
+    @profiled
     def run(self):
         r"""
         Builds the A and b matrices, and calls the solver specified in the
@@ -436,7 +643,78 @@ class GenericTransport(GenericAlgorithm):
         x_new = self._solve()
         self[self.settings['quantity']] = x_new
 
-    def _solve(self, A=None, b=None):
+    @profiled
+    def run_batch(self, values=None, rates=None):
+        r"""
+        Solves the system for several sets of boundary conditions at once,
+        such as different inlet faces or pressure levels.
+
+        Parameters
+        ----------
+        values : array_like
+            An Np-by-k array whose columns each hold one set of value BCs,
+            with ``nan`` in the pores without a value BC, in the same form as
+            ``'pore.bc_value'``.
+
+        rates : array_like
+            An Np-by-k array of rate BCs in the same form as
+            ``'pore.bc_rate'``.  If both ``values`` and ``rates`` are given
+            they must have the same number of columns.
+
+        Returns
+        -------
+        An Np-by-k array containing the solution for each set of BCs.  The
+        results are not stored on the object and the BCs already applied to
+        it are left untouched.
+
+        Notes
+        -----
+        The sets are grouped by the locations of their value BCs, since these
+        determine the **A** matrix.  **A** is built and reduced once per
+        group, and the right hand sides of the group are solved together as
+        the columns of a single Np-by-k_g array: ``spsolve`` applies one
+        factorization to the whole block, ``pyamg`` reuses one hierarchy for
+        every column, and the iterative solvers are called once per column.
+        Like ``run``, this solves a linear system so source terms are not
+        included.
+
+        """
+        BCs = [np.array(v, dtype=float) for v in (values, rates)
+               if v is not None]
+        if len(BCs) == 0:
+            raise Exception('No boundary conditions were given')
+        if any((v.ndim != 2) or (v.shape[0] != self.Np) for v in BCs):
+            raise Exception('The boundary conditions must be given as ' +
+                            'Np-by-k arrays')
+        k = BCs[0].shape[1]
+        if any(v.shape[1] != k for v in BCs):
+            raise Exception('values and rates must have the same number ' +
+                            'of columns')
+        nans = np.full((self.Np, k), np.nan)
+        values = nans if values is None else BCs[0]
+        rates = nans if rates is None else BCs[-1]
+        # Group the sets by the locations of their value BCs
+        locs, group = np.unique(np.isfinite(values).T, axis=0,
+                                return_inverse=True)
+        group = group.ravel()
+        self._build_A()
+        A = self.A
+        x = np.zeros((self.Np, k))
+        for i in range(locs.shape[0]):
+            cols = np.where(group == i)[0]
+            b = np.zeros((self.Np, cols.size))
+            ind = np.isfinite(rates[:, cols])
+            b[ind] = rates[:, cols][ind]
+            A_BC = A
+            if np.any(locs[i]):
+                if isinstance(A, LaplacianOperator):
+                    A_BC = A.copy()  # Since it is reduced in-place
+                A_BC = self._apply_value_BCs(A_BC, b, values[:, cols])
+            x[:, cols] = self._solve(A=A_BC, b=b)
+        return x
+
+    @profiled
+    def _solve(self, A=None, b=None, x0=None):
         r"""
         Sends the A and b matrices to the specified solver, and solves for *x*
         given the boundary conditions, and source terms based on the present
@@ -451,7 +729,16 @@ class GenericTransport(GenericAlgorithm):
 
         b : ND-array
             The RHS matrix in any format.  If not specified, then it uses
-            the ``b`` matrix attached to the object.
+            the ``b`` matrix attached to the object.  If it is Np-by-k, each
+            column is solved for and the solutions are returned in the same
+            shape.
+
+        x0 : ND-array
+            The initial guess passed to iterative solvers.  If not specified
+            and ``warm_start`` is ``True`` in ``settings``, the present value
+            of ``quantity`` is used, which is the previous iterate during
+            Picard iterations and the previous time step in transient runs.
+            Direct solvers ignore it.
 
         Notes
         -----
@@ -469,6 +756,12 @@ class GenericTransport(GenericAlgorithm):
             b = self.b
             if b is None:
                 raise Exception('The b matrix has not been built yet')
+        if np.ndim(b) == 2:
+            return self._solve_block(A=A, b=b)
+        if (x0 is None) and self.settings['warm_start']:
+            x0 = self._get_x0(b)
+        if isinstance(A, LaplacianOperator):
+            return self._solve_matrix_free(A=A, b=b, x0=x0)
         A = A.tocsr()
 
         # Default behavior -> use Scipy's default solver (spsolve)
@@ -479,7 +772,8 @@ class GenericTransport(GenericAlgorithm):
 
         # Set tolerance for iterative solvers
         rtol = self.settings['solver_rtol']
-        min_A = np.abs(A.data).min()
+        nonzero = A.data[A.data != 0]  # Skip explicit zeros
+        min_A = np.abs(nonzero).min() if nonzero.size else 0.0
         min_b = np.abs(b).min() or 1e100
         atol = min(min_A, min_b) * rtol
 
@@ -492,11 +786,13 @@ class GenericTransport(GenericAlgorithm):
                          'minres', 'gcrotmk', 'qmr']
             solver = getattr(sprs.linalg, self.settings['solver_type'])
             if self.settings['solver_type'] in iterative:
-                x, exit_code = solver(A=A, b=b, atol=atol, tol=rtol,
+                x, exit_code = solver(A=A, b=b, x0=x0, atol=atol, tol=rtol,
                                       maxiter=self.settings['solver_maxiter'])
                 if exit_code > 0:
                     raise Exception('SciPy solver did not converge! ' +
                                     'Exit code: ' + str(exit_code))
+            elif self.settings['solver_type'] == 'spsolve':
+                x = self._get_solver(A)(b)
             else:
                 x = solver(A=A, b=b)
             return x
@@ -509,7 +805,7 @@ class GenericTransport(GenericAlgorithm):
             else:
                 raise Exception('PETSc is not installed.')
             # Define the petsc linear system converting the scipy objects
-            ls = SLS(A=A, b=b)
+            ls = SLS(A=A, b=b, x0=x0)
             sets = self.settings
             sets = {k: v for k, v in sets.items() if k.startswith('solver_')}
             sets = {k.split('solver_')[1]: v for k, v in sets.items()}
@@ -520,13 +816,118 @@ class GenericTransport(GenericAlgorithm):
 
         # PyAMG
         if self.settings['solver_family'] == 'pyamg':
+            ml = self._get_solver(A)
+            x = ml.solve(b=b, x0=x0, tol=1e-6)
+            return x
+
+    def _solve_block(self, A, b):
+        r"""
+        Solves for several right hand sides at once, given as the columns of
+        *b*.  The ``spsolve`` factorization is applied to the whole block in
+        a single call and the ``pyamg`` hierarchy is built once for all
+        columns, while the other solvers are called once per column.
+        """
+        family = self.settings['solver_family']
+        if sprs.issparse(A) and (family == 'scipy') and \
+                (self.settings['solver_type'] == 'spsolve'):
+            return self._get_solver(A.tocsr())(b)
+        if sprs.issparse(A) and (family == 'pyamg'):
+            ml = self._get_solver(A.tocsr())
+            return np.column_stack([ml.solve(b=bi, tol=1e-6) for bi in b.T])
+        return np.column_stack([self._solve(A=A, b=bi) for bi in b.T])
+
+    def _solve_matrix_free(self, A, b, x0=None):
+        r"""
+        Solves the system using one of the iterative solvers of the ``scipy``
+        family with the given ``LaplacianOperator``, preconditioned by its
+        diagonal if ``solver_preconditioner`` is 'jacobi'
+        """
+        iterative = ['bicg', 'bicgstab', 'cg', 'cgs', 'gmres', 'lgmres',
+                     'minres', 'gcrotmk', 'qmr']
+        if (self.settings['solver_family'] != 'scipy') or \
+                (self.settings['solver_type'] not in iterative):
+            raise Exception('matrix_free requires one of the iterative ' +
+                            'solvers of the scipy family: ' + str(iterative))
+        rtol = self.settings['solver_rtol']
+        min_b = np.abs(b).min() or 1e100
+        atol = min(A.min_abs(), min_b) * rtol
+        M = None
+        if self.settings['solver_preconditioner'] == 'jacobi':
+            M = A.jacobi()
+        solver = getattr(sprs.linalg, self.settings['solver_type'])
+        x, exit_code = solver(A=A, b=b, x0=x0, atol=atol, tol=rtol, M=M,
+                              maxiter=self.settings['solver_maxiter'])
+        if exit_code > 0:
+            raise Exception('SciPy solver did not converge! ' +
+                            'Exit code: ' + str(exit_code))
+        return x
+
+    def _get_x0(self, b):
+        r"""
+        Returns the present value of ``quantity`` as an initial guess for the
+        solution, or ``None`` if it has not been computed or does not match
+        the shape of *b*.
+        """
+        quantity = self.settings['quantity']
+        if (quantity is None) or (quantity not in self.keys()):
+            return None
+        x0 = np.array(self[quantity], dtype=float)
+        if (x0.shape != np.shape(b)) or not np.all(np.isfinite(x0)):
+            return None
+        return x0
+
+    def _get_solver(self, A):
+        r"""
+        Returns the factorization or AMG hierarchy of the given matrix for
+        the ``solver_family`` in ``settings``, reusing the previous one if
+        the matrix has not changed.
+
+        Parameters
+        ----------
+        A : CSR sparse matrix
+            The coefficient matrix, with all BCs and source terms applied
+
+        Returns
+        -------
+        For the ``scipy`` family a function that takes *b* and returns *x*,
+        as given by ``scipy.sparse.linalg.factorized``, and for ``pyamg`` a
+        multilevel solver object.
+
+        Notes
+        -----
+        The cache holds a copy of the pattern and values of the last matrix,
+        which are compared against ``A`` on every call.  This is far cheaper
+        than refactorizing, so repeated solves with the same *A*, such as
+        implicit time steps with a constant ``t_step``, only factorize once.
+        Set ``cache_solver`` in ``settings`` to ``False`` to disable it.
+
+        """
+        family = self.settings['solver_family']
+        if self.settings['cache_solver'] is False:
+            self._solver_cache = None
+        cache = self._solver_cache
+        if (cache is not None) and (cache['family'] == family) and \
+                (cache['shape'] == A.shape) and \
+                np.array_equal(cache['indptr'], A.indptr) and \
+                np.array_equal(cache['indices'], A.indices) and \
+                np.array_equal(cache['data'], A.data):
+            return cache['solver']
+        if family == 'scipy':
+            solver = sprs.linalg.factorized(A.tocsc())
+        elif family == 'pyamg':
             if importlib.util.find_spec('pyamg'):
                 import pyamg
             else:
                 raise Exception('pyamg is not installed.')
-            ml = pyamg.ruge_stuben_solver(A)
-            x = ml.solve(b=b, tol=1e-6)
-            return x
+            solver = pyamg.ruge_stuben_solver(A)
+        if self.settings['cache_solver'] is not False:
+            self._solver_cache = {'family': family,
+                                  'shape': A.shape,
+                                  'indptr': A.indptr.copy(),
+                                  'indices': A.indices.copy(),
+                                  'data': A.data.copy(),
+                                  'solver': solver}
+        return solver
 
     def results(self, times='all', t_precision=12, **kwargs):
         r"""
@@ -551,8 +952,8 @@ class GenericTransport(GenericAlgorithm):
         if 'steps' in kwargs.keys():
             times = kwargs['steps']
         t_pre = t_precision
-        quantity = self.settings['quantity']
-        q = [k for k in list(self.keys()) if quantity in k]
+        outputs = self._get_outputs()
+        q = list(outputs.keys())
         if times == 'all':
             t = q
         elif type(times) in [float, int]:
@@ -576,9 +977,17 @@ class GenericTransport(GenericAlgorithm):
                 j = (str(int(round(i, t_pre)*10**n))+('e-'+str(n))*(n != 0))
                 t_str = [k for k in q if j == k.split('@')[-1]]
                 t += (t_str)
-        d = {k: self[k] for k in t}
+        d = {k: outputs[k] for k in t}
         return d
 
+    def _get_outputs(self):
+        r"""
+        Returns a dictionary of the stored solutions, including any transient
+        ones under keys of the form ``'pore.quantity@time'``.
+        """
+        quantity = self.settings['quantity']
+        return {k: self[k] for k in list(self.keys()) if quantity in k}
+
     def rate(self, pores=[], throats=[], mode='group'):
         r"""
         Calculates the net rate of material moving into a given set of pores or
@@ -755,3 +1164,135 @@ class GenericTransport(GenericAlgorithm):
             logger.error('A unique value of length could not be found')
         length = Ls[0]
         return length
+
+
+class LaplacianOperator(sprs.linalg.LinearOperator):
+    r"""
+    The Laplacian matrix of a network weighted by throat conductances,
+    represented without assembling it
+
+    Parameters
+    ----------
+    conns : ND-array
+        The Nt-by-2 'throat.conns' array of the network
+
+    g : ND-array
+        The throat conductances, which can be Nt-long for symmetric
+        conductances or 2*Nt-long (or Nt-by-2) for asymmetric ones, with the
+        same meaning as in ``create_adjacency_matrix``.
+
+    Np : int
+        The number of pores in the network
+
+    Notes
+    -----
+    Products with a vector are computed by scattering the throat fluxes onto
+    the pores with ``bincount``, so the memory used is that of the diagonal
+    plus a mask, since ``conns`` and ``g`` are referenced rather than copied.
+    The diagonal can be read and changed with ``diagonal`` and ``setdiag``
+    like a sparse matrix, which is how source terms are added, and value BCs
+    are applied with ``eliminate``.
+
+    """
+
+    def __init__(self, conns, g, Np):
+        super().__init__(dtype=np.float64, shape=(Np, Np))
+        Nt = conns.shape[0]
+        g = np.asarray(g)
+        if g.shape == (Nt, 2):
+            g_up, g_lo = g[:, 0], g[:, 1]
+        elif g.shape == (2*Nt, ):
+            g_up, g_lo = g[:Nt], g[Nt:]
+        elif g.shape == (Nt, ):
+            g_up, g_lo = g, g
+        else:
+            raise Exception('Received conductances are of incorrect length')
+        self.conns = conns
+        self.g_up = g_up
+        self.g_lo = g_lo
+        # The diagonal holds the column sums of the adjacency matrix
+        self.diag = np.bincount(conns[:, 1], weights=g_up, minlength=Np) + \
+            np.bincount(conns[:, 0], weights=g_lo, minlength=Np)
+        self.keep = None  # Throats not touching an eliminated pore
+
+    def _scatter(self, x, g_up, g_lo):
+        x = np.ravel(x)
+        c0, c1 = self.conns[:, 0], self.conns[:, 1]
+        w_up, w_lo = g_up*x[c1], g_lo*x[c0]
+        if self.keep is not None:
+            w_up, w_lo = w_up*self.keep, w_lo*self.keep
+        Np = self.shape[0]
+        y = self.diag*x - np.bincount(c0, weights=w_up, minlength=Np) - \
+            np.bincount(c1, weights=w_lo, minlength=Np)
+        return y
+
+    def _matvec(self, x):
+        return self._scatter(x, self.g_up, self.g_lo)
+
+    def _rmatvec(self, x):
+        return self._scatter(x, self.g_lo, self.g_up)
+
+    def copy(self):
+        r"""
+        Returns a copy with its own diagonal and mask, which still references
+        the same ``conns`` and conductances
+        """
+        A = LaplacianOperator.__new__(LaplacianOperator)
+        A.__dict__.update(self.__dict__)
+        A.diag = self.diag.copy()
+        if self.keep is not None:
+            A.keep = self.keep.copy()
+        return A
+
+    def diagonal(self):
+        r"""
+        Returns a copy of the diagonal
+        """
+        return self.diag.copy()
+
+    def setdiag(self, values):
+        r"""
+        Overwrites the diagonal with the given values
+        """
+        self.diag[:] = values
+
+    def eliminate(self, ind, f):
+        r"""
+        Removes the rows and columns of the pores in the boolean mask ``ind``
+        and puts ``f`` on their diagonal, as is done for value BCs
+        """
+        ind = np.asarray(ind, dtype=bool)
+        drop = ind[self.conns[:, 0]] | ind[self.conns[:, 1]]
+        if self.keep is not None:
+            drop = drop | ~self.keep
+        self.keep = ~drop
+        self.diag[ind] = f
+
+    def jacobi(self):
+        r"""
+        Returns the inverse of the diagonal as a ``LinearOperator`` for use as
+        a preconditioner, leaving rows with a zero diagonal unscaled
+        """
+        d = self.diag.copy()
+        d[d == 0] = 1
+        inv = 1/d
+        return sprs.linalg.LinearOperator(shape=self.shape, dtype=self.dtype,
+                                          matvec=lambda x: inv*np.ravel(x))
+
+    def mean_abs(self):
+        r"""
+        Returns the mean absolute value of the entries the assembled matrix
+        would store, i.e. two per throat and one per pore
+        """
+        g_abs = np.abs(self.g_up).sum() + np.abs(self.g_lo).sum()
+        n = 2*self.conns.shape[0] + self.shape[0]
+        return (g_abs + np.abs(self.diag).sum())/n
+
+    def min_abs(self):
+        r"""
+        Returns the smallest nonzero absolute value among the entries, or 0
+        if they are all zero
+        """
+        vals = [np.abs(v) for v in (self.g_up, self.g_lo, self.diag)]
+        vals = np.concatenate([v[v != 0] for v in vals])
+        return vals.min() if vals.size else 0.0
@@ -1,8 +1,10 @@
 import heapq as hq
+from multiprocessing import Pool
 import scipy as sp
 import numpy as np
 from openpnm.algorithms import GenericAlgorithm
-from openpnm.utils import logging
+from openpnm.topotools import site_percolation, find_trapped_clusters
+from openpnm.utils import logging, profiled
 logger = logging.getLogger(__name__)
 
 
@@ -141,6 +143,9 @@ class InvasionPercolation(GenericAlgorithm):
         self['throat.invasion_sequence'] = -1
         self['pore.invasion_sequence'] = -1
         self._tcount = 0
+        self._saturation_table = None
+        self._im_stamp = None
+        self._get_neighbor_index()
 
     def set_inlets(self, pores=[], overwrite=False):
         r"""
@@ -156,9 +161,15 @@ class InvasionPercolation(GenericAlgorithm):
 
         # Perform initial analysis on input pores
         Ts = self.project.network.find_neighbor_throats(pores=pores)
-        self.queue = []
-        [hq.heappush(self.queue, T) for T in self['throat.order'][Ts]]
-
+        # Keep track of throats that have been queued, to avoid duplicates
+        self._queued = self['throat.invasion_sequence'] > -1
+        Ts = Ts[~self._queued[Ts]]
+        self._queued[Ts] = True
+        self.queue = list(self['throat.order'][Ts])
+        hq.heapify(self.queue)
+        self._saturation_table = None
+
+    @profiled
     def run(self, n_steps=None):
         r"""
         Perform the algorithm
@@ -176,35 +187,86 @@ class InvasionPercolation(GenericAlgorithm):
         if len(queue) == 0:
             logger.warn('queue is empty, this network is fully invaded')
             return
-        t_sorted = self['throat.sorted']
-        t_order = self['throat.order']
         t_inv = self['throat.invasion_sequence']
         p_inv = self['pore.invasion_sequence']
-
-        count = 0
-        while (len(queue) > 0) and (count < n_steps):
-            # Find throat at the top of the queue
-            t = hq.heappop(queue)
-            # Extract actual throat number
-            t_next = t_sorted[t]
-            t_inv[t_next] = self._tcount
-            # If throat is duplicated
-            while len(queue) > 0 and queue[0] == t:
-                # Note: Preventing duplicate entries below might save some time
-                t = hq.heappop(queue)
-            # Find pores connected to newly invaded throat
-            Ps = self.project.network['throat.conns'][t_next]
-            # Remove already invaded pores from Ps
-            Ps = Ps[p_inv[Ps] < 0]
-            if len(Ps) > 0:
-                p_inv[Ps] = self._tcount
-                Ts = self.project.network.find_neighbor_throats(pores=Ps)
-                Ts = Ts[t_inv[Ts] < 0]  # Remove invaded throats from Ts
-                [hq.heappush(queue, T) for T in t_order[Ts]]
-            count += 1
-            self._tcount += 1
+        self._tcount = _invade(queue=queue, queued=self._queued,
+                               p_inv=p_inv, t_inv=t_inv,
+                               tcount=self._tcount, n_steps=n_steps,
+                               data=self._get_invasion_data())
         self['throat.invasion_sequence'] = t_inv
         self['pore.invasion_sequence'] = p_inv
+        self._saturation_table = None
+
+    def _get_invasion_data(self):
+        # The arrays describing the network and its entry pressures, which do
+        # not change between invasions
+        indptr, indices = self._get_neighbor_index()
+        return (self.project.network['throat.conns'], indptr, indices,
+                self['throat.sorted'], self['throat.order'])
+
+    def _get_neighbor_index(self):
+        r"""
+        Returns the ``indptr`` and ``indices`` arrays of the incidence matrix
+        in CSR form, used to find the throats neighboring each newly invaded
+        pore.  These are rebuilt if the network's 'throat.conns' or size has
+        changed since they were made.
+        """
+        net = self.project.network
+        conns = net['throat.conns']
+        stamp = (id(conns), net._get_version('throat.conns'), net.Np, net.Nt)
+        if getattr(self, '_im_stamp', None) != stamp:
+            im = net.create_incidence_matrix(fmt='csr')
+            self._im_indptr = im.indptr
+            self._im_indices = im.indices
+            self._im_stamp = stamp
+        return self._im_indptr, self._im_indices
+
+    def run_batch(self, inlets, processes=None):
+        r"""
+        Runs a complete invasion from each of several sets of inlets, such as
+        each face of the domain or a number of random injection points.
+
+        Parameters
+        ----------
+        inlets : list
+            A list containing one set of inlet pores per invasion, each given
+            as an array of indices or a boolean mask.
+
+        processes : int, optional
+            The number of worker processes over which the invasions are
+            spread.  If ``None`` (default) the number of CPUs is used, and if
+            1 the invasions are run one after the other in this process.
+
+        Returns
+        -------
+        A dictionary containing the invasion sequence of every pore and
+        throat in each invasion, as Np-by-k and Nt-by-k arrays under
+        **'pore.invasion_sequence'** and **'throat.invasion_sequence'**.  The
+        results are not stored on the object.
+
+        Notes
+        -----
+        The entry pressures are sorted and the pore-to-throat lookup table is
+        built only once, by ``setup``, and shared by all the invasions.  Each
+        invasion gives the same result as calling ``set_inlets`` and ``run``
+        after ``setup``.
+
+        """
+        inlets = [self._parse_indices(Ps) for Ps in inlets]
+        data = self._get_invasion_data()
+        if (processes == 1) or (len(inlets) < 2):
+            seqs = [_invade_from(Ps, data=data) for Ps in inlets]
+        else:
+            with Pool(processes=processes, initializer=_init_batch,
+                      initargs=(data, )) as pool:
+                seqs = pool.map(_invade_from, inlets)
+        p_inv = np.zeros((self.Np, len(inlets)), dtype=int)
+        t_inv = np.zeros((self.Nt, len(inlets)), dtype=int)
+        for i, (p_seq, t_seq) in enumerate(seqs):
+            p_inv[:, i] = p_seq
+            t_inv[:, i] = t_seq
+        return {'pore.invasion_sequence': p_inv,
+                'throat.invasion_sequence': t_inv}
 
     def results(self, Snwp):
         r"""
@@ -213,9 +275,11 @@ class InvasionPercolation(GenericAlgorithm):
 
         Parameters
         ----------
-        Snwp : scalar, between 0 and 1
+        Snwp : scalar or array_like, between 0 and 1
             The network saturation for which the phase configuration is
-            desired.
+            desired.  If an array of N saturations is given then the
+            occupancies are returned as Np-by-N and Nt-by-N arrays, with one
+            column per saturation.
 
         Returns
         -------
@@ -228,32 +292,51 @@ class InvasionPercolation(GenericAlgorithm):
         **'throat.occupancy'** : Same as described above but for throats.
 
         """
-        net = self.project.network
-        P12 = net['throat.conns']
-        # Fetch void volume for pores and throats
-        Vp = net[self.settings['pore_volume']]
-        Vt = net[self.settings['throat_volume']]
-        # Fetch the order of filling
+        S = self._get_saturation_table()
+        # Find throat invasion step where Snwp was reached, which is the last
+        # step before the saturation reaches Snwp
+        N = np.searchsorted(S, Snwp, side='left') - 1.0
+        N = np.where(N < 0, -np.inf, N)
         Np = self['pore.invasion_sequence']
         Nt = self['throat.invasion_sequence']
-        # Create Nt-long mask of which pores were filled when throat was filled
-        Pinv = (Np[P12].T == Nt).T
-        # If a pore and throat filled together, find combined volume
-        Vinv = sp.vstack(((Pinv*Vp[P12]).T, Vt)).T
-        Vinv = sp.sum(Vinv, axis=1)
-        # Convert to cumulative volume filled as each throat is invaded
-        x = sp.argsort(Nt)  # Find order throats were invaded
-        Vinv_cum = np.cumsum(Vinv[x])
-        # Normalized cumulative volume filled into saturation
-        S = Vinv_cum/(Vp.sum() + Vt.sum())
-        # Find throat invasion step where Snwp was reached
-        try:
-            N = sp.where(S < Snwp)[0][-1]
-        except:
-            N = -np.inf
+        if np.ndim(Snwp) > 0:
+            Np = Np[:, np.newaxis]
+            Nt = Nt[:, np.newaxis]
         data = {'pore.occupancy': Np <= N, 'throat.occupancy': Nt <= N}
         return data
 
+    def _get_saturation_table(self):
+        r"""
+        Returns the saturation reached as each throat is invaded, in order of
+        invasion.  This is computed on the first call after each change to
+        the invasion sequence or to the pore and throat volumes, and then
+        reused.
+        """
+        stamp = self._get_network_stamp([self.settings['pore_volume'],
+                                         self.settings['throat_volume']])
+        if (self._saturation_table is None) or \
+                (self._saturation_table[0] != stamp):
+            net = self.project.network
+            P12 = net['throat.conns']
+            # Fetch void volume for pores and throats
+            Vp = net[self.settings['pore_volume']]
+            Vt = net[self.settings['throat_volume']]
+            # Fetch the order of filling
+            Np = self['pore.invasion_sequence']
+            Nt = self['throat.invasion_sequence']
+            # Create Nt-long mask of which pores were filled when throat was
+            # filled
+            Pinv = (Np[P12].T == Nt).T
+            # If a pore and throat filled together, find combined volume
+            Vinv = sp.vstack(((Pinv*Vp[P12]).T, Vt)).T
+            Vinv = sp.sum(Vinv, axis=1)
+            # Convert to cumulative volume filled as each throat is invaded
+            x = sp.argsort(Nt)  # Find order throats were invaded
+            Vinv_cum = np.cumsum(Vinv[x])
+            # Normalized cumulative volume filled into saturation
+            self._saturation_table = (stamp, Vinv_cum/(Vp.sum() + Vt.sum()))
+        return self._saturation_table[1]
+
     def apply_trapping(self, outlets):
         """
         Apply trapping based on algorithm described by Y. Masson [1].
@@ -276,9 +359,9 @@ class InvasionPercolation(GenericAlgorithm):
             trapped cluster stops growing as this is the point of trapping in
             forward invasion time.
 
-        Logger info displays the invasion sequence and pore index and a message
-        with condition number based on the modified trapping rules and the
-        assignment of the pore to a given cluster.
+        The clusters are tracked in a disjoint-set forest, see
+        ``topotools.find_trapped_clusters``, so merging them does not require
+        relabelling every pore.
 
         Initially all invaded pores are given cluster label -1
         Outlets / Sinks are given -2
@@ -305,83 +388,29 @@ class InvasionPercolation(GenericAlgorithm):
         # First see if network is fully invaded
         net = self.project.network
         invaded_ps = self['pore.invasion_sequence'] > -1
+        clusters = None
         if ~np.all(invaded_ps):
             # Put defending phase into clusters
-            clusters = net.find_clusters2(~invaded_ps)
-            # Identify clusters that are connected to an outlet and set to -2
             # -1 is the invaded fluid
             # -2 is the defender fluid able to escape
-            # All others now trapped clusters which grow as invasion is reversed
-            out_clusters = sp.unique(clusters[outlets])
-            for c in out_clusters:
-                if c >= 0:
-                    clusters[clusters == c] = -2
-        else:
-            # Go from end
-            clusters = np.ones(net.Np, dtype=int)*-1
-            clusters[outlets] = -2
-
-        # Turn into a list for indexing
-        inv_seq = np.vstack((self['pore.invasion_sequence'].astype(int),
-                             np.arange(0, net.Np, dtype=int))).T
-        # Reverse sort list
-        inv_seq = inv_seq[inv_seq[:, 0].argsort()][::-1]
-        next_cluster_num = np.max(clusters)+1
-        # For all the steps after the inlets are set up to break-through
-        # Reverse the sequence and assess the neighbors cluster state
-        stopped_clusters = np.zeros(net.Np, dtype=bool)
-        all_neighbors = net.find_neighbor_pores(net.pores(), flatten=False,
-                                                include_input=True)
-        for un_seq, pore in inv_seq:
-            if pore not in outlets and un_seq > 0:  # Skip inlets and outlets
-                nc = clusters[all_neighbors[pore]]  # Neighboring clusters
-                unique_ns = np.unique(nc[nc != -1])  # Unique Neighbors
-                seq_pore = "S:"+str(un_seq)+" P:"+str(pore)
-                if np.all(nc == -1):
-                    # This is the start of a new trapped cluster
-                    clusters[pore] = next_cluster_num
-                    next_cluster_num += 1
-                    msg = (seq_pore+" C:1 new cluster number: " +
-                           str(clusters[pore]))
-                    logger.info(msg)
-                elif len(unique_ns) == 1:
-                    # Grow the only connected neighboring cluster
-                    if not stopped_clusters[unique_ns[0]]:
-                        clusters[pore] = unique_ns[0]
-                        msg = (seq_pore+" C:2 joins cluster number: " +
-                               str(clusters[pore]))
-                        logger.info(msg)
-                    else:
-                        clusters[pore] = -2
-                elif -2 in unique_ns:
-                    # We have reached a sink neighbor, stop growing cluster
-                    msg = (seq_pore+" C:3 joins sink cluster")
-                    logger.info(msg)
-                    clusters[pore] = -2
-                    # Stop growth and merging
-                    stopped_clusters[unique_ns[unique_ns > -1]] = True
-                else:
-                    # We might be able to do some merging
-                    # Check if any stopped clusters are neighbors
-                    if np.any(stopped_clusters[unique_ns]):
-                        msg = (seq_pore+" C:4 joins sink cluster")
-                        logger.info(msg)
-                        clusters[pore] = -2
-                        # Stop growing all neighboring clusters
-                        stopped_clusters[unique_ns] = True
-                    else:
-                        # Merge multiple un-stopped trapped clusters
-                        new_num = unique_ns[0]
-                        clusters[pore] = new_num
-                        for c in unique_ns:
-                            clusters[clusters == c] = new_num
-                            msg = (seq_pore + " C:5 merge clusters: " +
-                                   str(c) + " into "+str(new_num))
-                            logger.info(msg)
+            # All others now trapped clusters which grow as invasion is
+            # reversed
+            conns = net['throat.conns']
+            clusters = site_percolation(conns, ~invaded_ps).sites
+            # Identify clusters that are connected to an outlet and set to -2
+            out_clusters = np.unique(clusters[outlets])
+            out_clusters = out_clusters[out_clusters >= 0]
+            clusters[np.in1d(clusters, out_clusters)] = -2
+        # Skip the inlets, then reverse the sequence up to break-through
+        seq = np.copy(self['pore.invasion_sequence'])
+        seq[seq == 0] = -1
+        am = net.create_adjacency_matrix(fmt='csr')
+        clusters = find_trapped_clusters(am=am, sequence=seq,
+                                         outlets=outlets, clusters=clusters)
 
         # And now return clusters
         self['pore.clusters'] = clusters
-        logger.info("Number of trapped clusters" +
+        logger.info("Number of trapped clusters " +
                     str(np.sum(np.unique(clusters) >= 0)))
         self['pore.trapped'] = self['pore.clusters'] > -1
         trapped_ts = net.find_neighbor_throats(self['pore.trapped'])
@@ -389,3 +418,67 @@ class InvasionPercolation(GenericAlgorithm):
         self['throat.trapped'][trapped_ts] = True
         self['pore.invasion_sequence'][self['pore.trapped']] = -1
         self['throat.invasion_sequence'][self['throat.trapped']] = -1
+        self._saturation_table = None
+
+
+def _invade(queue, queued, p_inv, t_inv, tcount, n_steps, data):
+    r"""
+    Invades the throats in ``queue`` in order of entry pressure, along with
+    their pores, for up to ``n_steps`` steps.  The arrays are updated in
+    place, and the final step count is returned.
+    """
+    conns, indptr, indices, t_sorted, t_order = data
+    count = 0
+    while (len(queue) > 0) and (count < n_steps):
+        # Find throat at the top of the queue
+        t = hq.heappop(queue)
+        # Extract actual throat number
+        t_next = t_sorted[t]
+        t_inv[t_next] = tcount
+        # Find pores connected to newly invaded throat
+        Ps = conns[t_next]
+        # Remove already invaded pores from Ps
+        Ps = Ps[p_inv[Ps] < 0]
+        if len(Ps) > 0:
+            p_inv[Ps] = tcount
+            # Find throats on the newly invaded pores not yet queued
+            Ts = [indices[indptr[P]:indptr[P+1]] for P in Ps]
+            Ts = np.unique(np.concatenate(Ts))
+            Ts = Ts[~queued[Ts]]
+            queued[Ts] = True
+            for T in t_order[Ts]:
+                hq.heappush(queue, T)
+        count += 1
+        tcount += 1
+    return tcount
+
+
+# The invasion data shared by the worker processes of run_batch
+_batch_data = None
+
+
+def _init_batch(data):
+    global _batch_data
+    _batch_data = data
+
+
+def _invade_from(pores, data=None):
+    r"""
+    Runs a complete invasion from the given inlet pores, and returns the
+    pore and throat invasion sequences.
+    """
+    if data is None:
+        data = _batch_data
+    conns, indptr, indices, t_sorted, t_order = data
+    p_inv = -np.ones((indptr.size - 1, ), dtype=int)
+    t_inv = -np.ones((t_sorted.size, ), dtype=int)
+    p_inv[pores] = 0
+    queued = np.zeros((t_sorted.size, ), dtype=bool)
+    Ts = [indices[indptr[P]:indptr[P+1]] for P in pores]
+    Ts = np.unique(np.concatenate(Ts + [np.array([], dtype=int)]))
+    queued[Ts] = True
+    queue = list(t_order[Ts])
+    hq.heapify(queue)
+    _invade(queue=queue, queued=queued, p_inv=p_inv, t_inv=t_inv,
+            tcount=0, n_steps=np.inf, data=data)
+    return p_inv, t_inv
@@ -10,11 +10,13 @@ import scipy as sp
 import numpy as np
 from openpnm.algorithms import GenericAlgorithm
 from openpnm.topotools import site_percolation, bond_percolation
+from openpnm.topotools import find_trapped_clusters
 import time
 from collections import namedtuple
 import logging
 import matplotlib.pyplot as plt
 from scipy.sparse import coo_matrix
+from openpnm.utils import profiled
 logger = logging.getLogger(__name__)
 
 
@@ -291,6 +293,7 @@ class MixedInvasionPercolation(GenericAlgorithm):
                 data.append(elem_type)
                 hq.heappush(queue, data)
 
+    @profiled
     def run(self, max_pressure=None):
         r"""
         Perform the algorithm
@@ -581,9 +584,9 @@ class MixedInvasionPercolation(GenericAlgorithm):
         trapped cluster stops growing as this is the point of trapping in
         forward invasion time.
 
-        Logger info displays the invasion Sequence and pore index and a message
-        with condition number based on the modified trapping rules and the
-        assignment of the pore to a given cluster.
+        The clusters are tracked in a disjoint-set forest, see
+        ``topotools.find_trapped_clusters``, so merging them does not require
+        relabelling every pore.
 
         Initially all invaded pores are given cluster label -1
         Outlets / Sinks are given -2
@@ -609,85 +612,27 @@ class MixedInvasionPercolation(GenericAlgorithm):
         if np.sum(outlets) == 0:
             raise Exception('Outlets must be set using the set_outlets method' +
                             ' before applying trapping')
+        clusters = None
         if partial:
             # Set occupancy
             invaded_ps = self['pore.invasion_sequence'] > -1
             # Put defending phase into clusters
-            clusters = net.find_clusters2(~invaded_ps)
+            clusters = site_percolation(net['throat.conns'], ~invaded_ps).sites
             # Identify clusters that are connected to an outlet and set to -2
             # -1 is the invaded fluid
             # -2 is the defender fluid able to escape
             # All others now trapped clusters which grow as invasion is
             # reversed
-            out_clusters = sp.unique(clusters[outlets])
-            for c in out_clusters:
-                if c >= 0:
-                    clusters[clusters == c] = -2
-        else:
-            # Go from end
-            clusters = np.ones(net.Np, dtype=int)*-1
-            clusters[outlets] = -2
-
-        # Turn into a list for indexing
-        inv_seq = np.vstack((self['pore.invasion_sequence'].astype(int),
-                             np.arange(0, net.Np, dtype=int))).T
-        # Reverse sort list
-        inv_seq = inv_seq[inv_seq[:, 0].argsort()][::-1]
-        next_cluster_num = np.max(clusters)+1
-        # For all the steps after the inlets are set up to break-through
+            out_clusters = np.unique(clusters[outlets])
+            out_clusters = out_clusters[out_clusters >= 0]
+            clusters[np.in1d(clusters, out_clusters)] = -2
         # Reverse the sequence and assess the neighbors cluster state
-        stopped_clusters = np.zeros(net.Np, dtype=bool)
-        all_neighbors = net.find_neighbor_pores(net.pores(), flatten=False,
-                                                include_input=True)
-        for un_seq, pore in inv_seq:
-            if ~outlets[pore] and un_seq > -1:  # Don't include outlets
-                nc = clusters[all_neighbors[pore]]  # Neighboring clusters
-                unique_ns = np.unique(nc[nc != -1])  # Unique Neighbors
-                seq_pore = "S:"+str(un_seq)+" P:"+str(pore)
-                if np.all(nc == -1):
-                    # This is the start of a new trapped cluster
-                    clusters[pore] = next_cluster_num
-                    next_cluster_num += 1
-                    msg = (seq_pore+" C:1 new cluster number: " +
-                           str(clusters[pore]))
-                    logger.info(msg)
-                elif len(unique_ns) == 1:
-                    # Grow the only connected neighboring cluster
-                    if not stopped_clusters[unique_ns[0]]:
-                        clusters[pore] = unique_ns[0]
-                        msg = (seq_pore+" C:2 joins cluster number: " +
-                               str(clusters[pore]))
-                        logger.info(msg)
-                    else:
-                        clusters[pore] = -2
-                elif -2 in unique_ns:
-                    # We have reached a sink neighbor, stop growing cluster
-                    msg = (seq_pore+" C:3 joins sink cluster")
-                    logger.info(msg)
-                    clusters[pore] = -2
-                    # Stop growth and merging
-                    stopped_clusters[unique_ns[unique_ns > -1]] = True
-                else:
-                    # We might be able to do some merging
-                    # Check if any stopped clusters are neighbors
-                    if np.any(stopped_clusters[unique_ns]):
-                        msg = (seq_pore+" C:4 joins sink cluster")
-                        logger.info(msg)
-                        clusters[pore] = -2
-                        # Stop growing all neighboring clusters
-                        stopped_clusters[unique_ns] = True
-                    else:
-                        # Merge multiple un-stopped trapped clusters
-                        new_num = unique_ns[0]
-                        clusters[pore] = new_num
-                        for c in unique_ns:
-                            clusters[clusters == c] = new_num
-                            msg = (seq_pore + " C:5 merge clusters: " +
-                                   str(c) + " into "+str(new_num))
-                            logger.info(msg)
+        am = net.create_adjacency_matrix(fmt='csr')
+        seq = self['pore.invasion_sequence']
+        clusters = find_trapped_clusters(am=am, sequence=seq,
+                                         outlets=outlets, clusters=clusters)
 
         # And now return clusters
-        clusters[outlets] = -2
         num_trap = np.sum(np.unique(clusters) >= 0)
         if num_trap > 0:
             logger.info("Number of trapped clusters " + str(num_trap))
@@ -695,11 +640,10 @@ class MixedInvasionPercolation(GenericAlgorithm):
             num_tPs = np.sum(self['pore.trapped'])
             logger.info("Number of trapped pores: " + str(num_tPs))
             self['pore.invasion_sequence'][self['pore.trapped']] = -1
-            self['throat.trapped'] = np.zeros([net.Nt], dtype=bool)
-            for c in np.unique(clusters[clusters >= 0]):
-                c_ts = net.find_neighbor_throats(clusters == c,
-                                                 mode='xnor')
-                self['throat.trapped'][c_ts] = True
+            # Throats are trapped if both pores are in the same cluster
+            c_ts = clusters[net['throat.conns']]
+            c_ts = (c_ts[:, 0] == c_ts[:, 1])*(c_ts[:, 0] >= 0)
+            self['throat.trapped'] = c_ts
             num_tTs = np.sum(self['throat.trapped'])
             logger.info("Number of trapped throats: " + str(num_tTs))
             self['throat.invasion_sequence'][self['throat.trapped']] = -1
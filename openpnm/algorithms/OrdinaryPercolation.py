@@ -3,9 +3,8 @@ import numpy as np
 import matplotlib.pyplot as plt
 from collections import namedtuple
 from openpnm.algorithms import GenericAlgorithm
-from openpnm.topotools import site_percolation, bond_percolation
-from openpnm.topotools import remove_isolated_clusters, ispercolating
-from openpnm.utils import logging
+from openpnm.topotools import percolation_thresholds, ispercolating
+from openpnm.utils import logging, profiled
 logger = logging.getLogger(__name__)
 
 
@@ -184,6 +183,7 @@ class OrdinaryPercolation(GenericAlgorithm):
         """
         self['pore.invasion_pressure'] = np.inf
         self['throat.invasion_pressure'] = np.inf
+        self._volume_table = None
         self['pore.invasion_sequence'] = -1
         self['throat.invasion_sequence'] = -1
         self['pore.inlets'] = False
@@ -217,6 +217,7 @@ class OrdinaryPercolation(GenericAlgorithm):
         self['pore.inlets'][Ps] = True
         self['pore.invasion_pressure'][Ps] = 0
         self['pore.invasion_sequence'][Ps] = 0
+        self._volume_table = None
 
     def set_outlets(self, pores=[], overwrite=False):
         r"""
@@ -332,10 +333,11 @@ class OrdinaryPercolation(GenericAlgorithm):
                                 inlets=Pin, outlets=Pout)
         return val
 
+    @profiled
     def run(self, points=25, start=None, stop=None):
         r"""
-        Runs the percolation algorithm to determine which pores and throats
-        will be invaded at each given pressure point.
+        Runs the percolation algorithm to determine the pressure at which
+        each pore and throat is invaded.
 
         Parameters
         ----------
@@ -345,6 +347,8 @@ class OrdinaryPercolation(GenericAlgorithm):
             points spaced between the lowest and highest values of throat
             entry pressures using logarithmic spacing.  To specify low and
             high pressure points use the ``start`` and ``stop`` arguments.
+            The default is 25 points.  If ``None`` then the exact invasion
+            pressure of each pore and throat is found instead.
 
         start : int
             The optional starting point to use when generating pressure points.
@@ -352,60 +356,59 @@ class OrdinaryPercolation(GenericAlgorithm):
         stop : int
             The optional stopping point to use when generating pressure points.
 
+        Notes
+        -----
+        The invasion pressures are found in a single sweep through the sorted
+        entry pressures using ``topotools.percolation_thresholds``, so the
+        cost does not depend on the number of points.  If points are given,
+        each pore and throat is assigned the lowest applied pressure at which
+        it is invaded, and those not invaded by the highest point are left
+        at ``inf``.
+
         """
         phase = self.project.find_phase(self)
         # Parse inputs and generate list of invasion points if necessary
         if self.settings['mode'] == 'bond':
             self['throat.entry_pressure'] = \
                 phase[self.settings['throat_entry_threshold']]
-            if start is None:
-                start = sp.amin(self['throat.entry_pressure'])*0.95
-            if stop is None:
-                stop = sp.amax(self['throat.entry_pressure'])*1.05
-
+            thresholds = self['throat.entry_pressure']
         elif self.settings['mode'] == 'site':
             self['pore.entry_pressure'] = \
                 phase[self.settings['pore_entry_threshold']]
-            if start is None:
-                start = sp.amin(self['pore.entry_pressure'])*0.95
-            if stop is None:
-                stop = sp.amax(self['pore.entry_pressure'])*1.05
+            thresholds = self['pore.entry_pressure']
         else:
             raise Exception('Percolation type has not been set')
-        if type(points) is int:
-            points = sp.logspace(start=sp.log10(max(1, start)),
-                                 stop=sp.log10(stop), num=points)
+        if points is not None:
+            if start is None:
+                start = sp.amin(thresholds)*0.95
+            if stop is None:
+                stop = sp.amax(thresholds)*1.05
+            if type(points) is int:
+                points = sp.logspace(start=sp.log10(max(1, start)),
+                                     stop=sp.log10(stop), num=points)
+            points = sp.sort(sp.array(points, dtype=float, ndmin=1))
 
         # Ensure pore inlets have been set IF access limitations is True
+        Pin = None
         if self.settings['access_limited']:
             if sp.sum(self['pore.inlets']) == 0:
                 raise Exception('Inlet pores must be specified first')
             else:
                 Pin = self['pore.inlets']
 
-        # Generate curve from points
-        conns = self.project.network['throat.conns']
-        for inv_val in points:
-            if self.settings['mode'] == 'bond':
-                t_invaded = self['throat.entry_pressure'] <= inv_val
-                labels = bond_percolation(conns, t_invaded)
-            elif self.settings['mode'] == 'site':
-                p_invaded = self['pore.entry_pressure'] <= inv_val
-                labels = site_percolation(conns, p_invaded)
-
-            # Optionally remove clusters not connected to the inlets
-            if self.settings['access_limited']:
-                labels = remove_isolated_clusters(labels=labels,
-                                                  inlets=Pin)
-
-            # Store current applied pressure in newly invaded pores
-            pinds = (self['pore.invasion_pressure'] == sp.inf) * \
-                    (labels.sites >= 0)
-            self['pore.invasion_pressure'][pinds] = inv_val
-            # Store current applied pressure in newly invaded throats
-            tinds = (self['throat.invasion_pressure'] == sp.inf) * \
-                    (labels.bonds >= 0)
-            self['throat.invasion_pressure'][tinds] = inv_val
+        # Find the exact pressure at which each pore and throat is invaded
+        net = self.project.network
+        vals = percolation_thresholds(net['throat.conns'], thresholds,
+                                      mode=self.settings['mode'],
+                                      inlets=Pin, Np=net.Np)
+        for element, inv_vals in zip(['pore', 'throat'], vals):
+            if points is not None:
+                # Round up to the first applied pressure point
+                inds = sp.searchsorted(points, inv_vals)
+                inv_vals = sp.concatenate((points, [sp.inf]))[inds]
+            # Store pressures in pores and throats not already invaded
+            inds = self[element + '.invasion_pressure'] == sp.inf
+            self[element + '.invasion_pressure'][inds] = inv_vals[inds]
 
         # Convert invasion pressures in sequence values
         Pinv = self['pore.invasion_pressure']
@@ -414,18 +417,43 @@ class OrdinaryPercolation(GenericAlgorithm):
         Tseq = sp.searchsorted(sp.unique(Tinv), Tinv)
         self['pore.invasion_sequence'] = Pseq
         self['throat.invasion_sequence'] = Tseq
+        self._volume_table = None
 
     def get_intrusion_data(self, Pc=None):
         r"""
         Obtain the numerical values of the calculated intrusion curve
 
+        Parameters
+        ----------
+        Pc : array_like, optional
+            The capillary pressures at which the saturation is wanted.  If
+            not given then every invasion pressure found by ``run`` is used,
+            along with 0.
+
         Returns
         -------
         A named-tuple containing arrays of applied capillary pressures and
         invading phase saturation.
 
+        Notes
+        -----
+        The saturations are looked up in a table of cumulative invaded volume
+        versus invasion pressure, which is built on the first call after
+        ``run``, so the cost of each point is only a binary search.
+
         """
-        net = self.project.network
+        points = self._get_intrusion_points(Pc)
+        Vp, Vt, Ps, Ts = self._get_volume_table()
+        # Count the pores and throats invaded at or below each pressure
+        Vnwp_p = Vp[np.searchsorted(Ps, points, side='right')]
+        Vnwp_t = Vt[np.searchsorted(Ts, points, side='right')]
+        # Convert volumes to saturations by normalizing with total pore volume
+        Snwp_all = (Vnwp_p + Vnwp_t)/(Vp[-1] + Vt[-1])
+        pc_curve = namedtuple('pc_curve', ('Pcap', 'Snwp'))
+        data = pc_curve(points, Snwp_all)
+        return data
+
+    def _get_intrusion_points(self, Pc=None):
         if Pc is None:
             # Infer list of applied capillary pressures
             points = np.unique(self['throat.invasion_pressure'])
@@ -434,28 +462,31 @@ class OrdinaryPercolation(GenericAlgorithm):
             if points[-1] == np.inf:  # Remove infinity from points if present
                 points = points[:-1]
         else:
-            points = np.array(Pc)
-        # Get pore and throat volumes
-        Pvol = net[self.settings['pore_volume']]
-        Tvol = net[self.settings['throat_volume']]
-        Total_vol = np.sum(Pvol) + np.sum(Tvol)
-        # Find cumulative filled volume at each applied capillary pressure
-        Vnwp_t = []
-        Vnwp_p = []
-        Vnwp_all = []
-        for p in points:
-            # Calculate filled pore volumes
-            p_inv, t_inv = self.results(p).values()
-            Vp = np.sum(Pvol*p_inv)
-            Vt = np.sum(Tvol*t_inv)
-            Vnwp_p.append(Vp)
-            Vnwp_t.append(Vt)
-            Vnwp_all.append(Vp + Vt)
-        # Convert volumes to saturations by normalizing with total pore volume
-        Snwp_all = [V/Total_vol for V in Vnwp_all]
-        pc_curve = namedtuple('pc_curve', ('Pcap', 'Snwp'))
-        data = pc_curve(points, Snwp_all)
-        return data
+            points = np.array(Pc, dtype=float, ndmin=1)
+        return points
+
+    def _get_volume_table(self):
+        r"""
+        Returns the cumulative pore and throat volumes invaded in order of
+        increasing invasion pressure, each starting from 0, along with the
+        sorted pore and throat invasion pressures.  The table is rebuilt
+        after each ``run`` and whenever the pore or throat volumes change.
+        """
+        stamp = self._get_network_stamp([self.settings['pore_volume'],
+                                         self.settings['throat_volume']])
+        if (self._volume_table is None) or (self._volume_table[0] != stamp):
+            net = self.project.network
+            table = []
+            for element in ['pore', 'throat']:
+                vol = net[self.settings[element + '_volume']]
+                vol = vol*np.ones((self._count(element), ))
+                inv = self[element + '.invasion_pressure']
+                order = np.argsort(inv, kind='mergesort')
+                table.append(np.concatenate(([0], np.cumsum(vol[order]))))
+                table.append(inv[order])
+            self._volume_table = (stamp, (table[0], table[2], table[1],
+                                          table[3]))
+        return self._volume_table[1]
 
     def plot_intrusion_curve(self, fig=None):
         r"""
@@ -482,9 +513,11 @@ class OrdinaryPercolation(GenericAlgorithm):
 
         Parameters
         ----------
-        Pc : scalar
+        Pc : scalar or array_like
             The capillary pressure for which an invading phase configuration
-            is desired.
+            is desired.  If an array of N pressures is given then the
+            occupancies are returned as Np-by-N and Nt-by-N arrays, with one
+            column per pressure.
 
         Returns
         -------
@@ -504,8 +537,13 @@ class OrdinaryPercolation(GenericAlgorithm):
         or algorithms.
 
         """
-        Psatn = self['pore.invasion_pressure'] <= Pc
-        Tsatn = self['throat.invasion_pressure'] <= Pc
+        if sp.ndim(Pc) > 0:
+            Pc = sp.array(Pc, dtype=float)[sp.newaxis, :]
+            Psatn = self['pore.invasion_pressure'][:, sp.newaxis] <= Pc
+            Tsatn = self['throat.invasion_pressure'][:, sp.newaxis] <= Pc
+        else:
+            Psatn = self['pore.invasion_pressure'] <= Pc
+            Tsatn = self['throat.invasion_pressure'] <= Pc
         inv_phase = {}
         inv_phase['pore.occupancy'] = sp.array(Psatn, dtype=float)
         inv_phase['throat.occupancy'] = sp.array(Tsatn, dtype=float)
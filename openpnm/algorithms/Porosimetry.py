@@ -1,6 +1,7 @@
 from openpnm.algorithms import OrdinaryPercolation
-from openpnm.utils import logging
+from openpnm.utils import logging, profiled
 import numpy as np
+from collections import namedtuple
 logger = logging.getLogger(__name__)
 
 
@@ -159,40 +160,117 @@ class Porosimetry(OrdinaryPercolation):
         if propname.startswith('throat'):
             self.settings['throat_partial_filling'] = propname
 
+    @profiled
     def run(self, points=25, start=None, stop=None):
+        r"""
+        Runs the porosimetry simulation to determine the capillary pressure
+        at which each pore and throat is intruded.
+
+        Parameters
+        ----------
+        points: int or array_like
+            An array containing the pressure points to apply.  If a scalar is
+            given then an array will be generated with the given number of
+            points spaced between the lowest and highest values of throat
+            entry pressures using logarithmic spacing.  The default is 25
+            points.  If ``None`` then the exact intrusion pressure of each
+            pore and throat is found instead.
+
+        start : int
+            The optional starting point to use when generating pressure points.
+
+        stop : int
+            The optional stopping point to use when generating pressure points.
+
+        Notes
+        -----
+        Porosimetry is always run as access limited bond percolation, so the
+        ``mode`` and ``access_limited`` settings must not be changed.
+
+        """
         if self.settings['mode'] is not 'bond':
             raise Exception('Porosimetry must be run as bond percolation')
         if self.settings['access_limited'] is False:
             raise Exception('Porosimetry must be run as access limited')
         super().run(points=points, start=start, stop=stop)
 
-    run.__doc__ = OrdinaryPercolation.run.__doc__
-
     def results(self, Pc):
         r"""
+        Determines the occupancy of each pore and throat at the given
+        capillary pressure, scaled by the partial filling fraction if any
+        partial filling models have been set.
+
+        Parameters
+        ----------
+        Pc : scalar or array_like
+            The capillary pressure for which an invading phase configuration
+            is desired.  If an array of N pressures is given then the
+            occupancies are returned as Np-by-N and Nt-by-N arrays, with one
+            column per pressure.
+
+        Returns
+        -------
+        A dictionary containing the ``'pore.occupancy'`` and
+        ``'throat.occupancy'`` arrays.
+
+        Notes
+        -----
+        The partial filling models are evaluated on the phase, so they are
+        regenerated once per pressure and the phase is left holding the last
+        pressure.
+
         """
         p_inv, t_inv = super().results(Pc).values()
         phase = self.project.find_phase(self)
         quantity = self.settings['quantity'].split('.')[-1]
+        points = np.array(Pc, dtype=float, ndmin=1)
         lpf = np.array([1])
         if self.settings['pore_partial_filling']:
-            # Set pressure on phase to current capillary pressure
-            phase['pore.'+quantity] = Pc
-            # Regenerate corresponding physics model
-            for phys in self.project.find_physics(phase=phase):
-                phys.regenerate_models(self.settings['pore_partial_filling'])
-            # Fetch partial filling fraction from phase object (0->1)
-            lpf = phase[self.settings['pore_partial_filling']]
-        # Calculate filled throat volumes
+            lpf = np.ones((self.Np, points.size))
         ltf = np.array([1])
         if self.settings['throat_partial_filling']:
-            # Set pressure on phase to current capillary pressure
-            phase['throat.'+quantity] = Pc
-            # Regenerate corresponding physics model
-            for phys in self.project.find_physics(phase=phase):
-                phys.regenerate_models(self.settings['throat_partial_filling'])
-            # Fetch partial filling fraction from phase object (0->1)
-            ltf = phase[self.settings['throat_partial_filling']]
+            ltf = np.ones((self.Nt, points.size))
+        for i, p in enumerate(points):
+            if self.settings['pore_partial_filling']:
+                # Set pressure on phase to current capillary pressure
+                phase['pore.'+quantity] = p
+                # Regenerate corresponding physics model
+                for phys in self.project.find_physics(phase=phase):
+                    phys.regenerate_models(
+                        self.settings['pore_partial_filling'])
+                # Fetch partial filling fraction from phase object (0->1)
+                lpf[:, i] = phase[self.settings['pore_partial_filling']]
+            # Calculate filled throat volumes
+            if self.settings['throat_partial_filling']:
+                phase['throat.'+quantity] = p
+                for phys in self.project.find_physics(phase=phase):
+                    phys.regenerate_models(
+                        self.settings['throat_partial_filling'])
+                ltf[:, i] = phase[self.settings['throat_partial_filling']]
+        if np.ndim(Pc) == 0:
+            lpf = lpf[:, 0] if lpf.ndim == 2 else lpf
+            ltf = ltf[:, 0] if ltf.ndim == 2 else ltf
         p_inv = p_inv*lpf
         t_inv = t_inv*ltf
         return {'pore.occupancy': p_inv, 'throat.occupancy': t_inv}
+
+    def get_intrusion_data(self, Pc=None):
+        if not (self.settings['pore_partial_filling'] or
+                self.settings['throat_partial_filling']):
+            return super().get_intrusion_data(Pc=Pc)
+        # The partial filling models must be regenerated at each pressure,
+        # which is done for blocks of points to limit the memory used
+        net = self.project.network
+        points = self._get_intrusion_points(Pc)
+        Pvol = net[self.settings['pore_volume']]
+        Tvol = net[self.settings['throat_volume']]
+        Total_vol = np.sum(Pvol) + np.sum(Tvol)
+        Snwp = np.zeros_like(points)
+        for i in range(0, points.size, 100):
+            p_inv, t_inv = self.results(points[i:i+100]).values()
+            Snwp[i:i+100] = (np.dot(Pvol, p_inv) +
+                             np.dot(Tvol, t_inv))/Total_vol
+        pc_curve = namedtuple('pc_curve', ('Pcap', 'Snwp'))
+        return pc_curve(points, Snwp)
+
+    get_intrusion_data.__doc__ = OrdinaryPercolation.get_intrusion_data.__doc__
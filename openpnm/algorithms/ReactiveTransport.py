@@ -1,6 +1,6 @@
 import numpy as np
 from openpnm.algorithms import GenericTransport
-from openpnm.utils import logging
+from openpnm.utils import logging, profiled
 logger = logging.getLogger(__name__)
 
 
@@ -21,6 +21,10 @@ class ReactiveTransport(GenericTransport):
 
     This subclass performs steady simulations of transport phenomena with
     reactions when source terms are added.
+
+    After ``run`` the ``convergence`` attribute holds a dictionary with the
+    number of nonlinear ``'iterations'``, the ``'residuals'`` recorded at each
+    of them and whether the solution ``'converged'``.
     """
 
     def __init__(self, settings={}, phase=None, **kwargs):
@@ -30,6 +34,8 @@ class ReactiveTransport(GenericTransport):
                    'max_iter': 5000,
                    'relaxation_source': 1,
                    'relaxation_quantity': 1,
+                   'nonlinear_solver': 'picard',
+                   'newton_min_step': 1e-4,
                    'gui': {'setup':        {'phase': None,
                                             'quantity': '',
                                             'conductance': '',
@@ -48,6 +54,7 @@ class ReactiveTransport(GenericTransport):
         super().__init__(**kwargs)
         self.settings.update(def_set)
         self.settings.update(settings)
+        self.convergence = {}
         if phase is not None:
             self.setup(phase=phase)
 
@@ -94,6 +101,21 @@ class ReactiveTransport(GenericTransport):
             Factor approaching 1 : fast simulation but may be unstable.
             Default value is 1 (no under-relaxation).
 
+        nonlinear_solver : string
+            The scheme used to handle the source terms.  Options are:
+
+            *'picard'*: (Default) Successive substitution of the linearized
+            source terms, damped by the relaxation factors above.
+
+            *'newton'*: Newton-Raphson iterations using 'S1' as the Jacobian
+            of the source terms, with a backtracking line search on the norm
+            of the residual.  The relaxation factors are not used.
+
+        newton_min_step : scalar
+            The smallest fraction of the Newton step the line search will try.
+            If the residual still does not decrease the iterations stop and
+            the solution is reported as not converged.  The default is 1e-4.
+
         Notes
         -----
         Under-relaxation is a technique used for improving stability of a
@@ -197,6 +219,7 @@ class ReactiveTransport(GenericTransport):
 
     _set_BC.__doc__ = GenericTransport._set_BC.__doc__
 
+    @profiled
     def _update_physics(self):
         """r
         Update physics using the current value of 'quantity'
@@ -260,6 +283,7 @@ class ReactiveTransport(GenericTransport):
             # Add S2 to b
             self._b[Ps] = self._b[Ps] + f1*S2
 
+    @profiled
     def run(self, x=None):
         r"""
         Builds the A and b matrices, and calls the solver specified in the
@@ -302,8 +326,11 @@ class ReactiveTransport(GenericTransport):
         if x is None:
             x = np.zeros(shape=[self.Np, ], dtype=float)
         self[self.settings['quantity']] = x
+        if self.settings['nonlinear_solver'] == 'newton':
+            return self._run_newton(x=x)
         relax = self.settings['relaxation_quantity']
         res = 1e+06  # Initialize the residual
+        residuals = []
         for itr in range(int(self.settings['max_iter'])):
             if res >= self.settings['r_tolerance']:
                 logger.info('Tolerance not met: ' + str(res))
@@ -317,9 +344,113 @@ class ReactiveTransport(GenericTransport):
                 x_new = relax*x_new + (1-relax)*self[self.settings['quantity']]
                 self[self.settings['quantity']] = x_new
                 res = np.sum(np.absolute(x**2 - x_new**2))
+                residuals.append(res)
                 x = x_new
             if (res < self.settings['r_tolerance'] or
                     self.settings['sources'] == []):
                 logger.info('Solution converged: ' + str(res))
                 break
+        converged = (res < self.settings['r_tolerance']) or \
+            (self.settings['sources'] == [])
+        self.convergence = {'iterations': len(residuals),
+                            'residuals': residuals,
+                            'converged': converged}
         return x_new
+
+    def _run_newton(self, x):
+        r"""
+        Solves for 'quantity' using Newton-Raphson iterations, where the
+        Jacobian is the 'A' matrix with the source term slopes 'S1' subtracted
+        from its diagonal, and each step is shortened by a backtracking line
+        search until the norm of the residual decreases.
+        Stops when the change the full, undamped Newton step would make to the
+        solution falls below 'r_tolerance' (measured as in '_run_reactive'),
+        when the line search cannot decrease the residual with a step of at
+        least 'newton_min_step', in which case the last iterate is kept, or
+        when the maximum number of iterations is reached.  Only the first
+        case is reported as converged.
+
+        Parameters
+        ----------
+        x : ND-array
+            Initial guess of unknown variable
+
+        Returns
+        -------
+        x_new : ND-array
+            Solution array.
+
+        Notes
+        -----
+        The norm of the residual after each iteration is stored under
+        'residuals' in the ``convergence`` attribute.
+        """
+        phase = self.project.phases()[self.settings['phase']]
+        self._build_A(force=True)
+        self._build_b(force=True)
+        self._apply_BCs()
+        A, b = self.A, self.b
+        min_step = self.settings['newton_min_step']
+        res = self._get_residual(A=A, b=b, x=x)
+        res_norm = np.linalg.norm(res)
+        dx_norm = 1e+06
+        stalled = False
+        residuals = []
+        for itr in range(int(self.settings['max_iter'])):
+            # Jacobian of A*x - b - rate(x)
+            J = A.copy()
+            datadiag = J.diagonal()
+            for item in self.settings['sources']:
+                Ps = self.pores(item)
+                datadiag[Ps] = datadiag[Ps] - phase[item+'.'+'S1'][Ps]
+            J.setdiag(datadiag)
+            dx = self._solve(A=J, b=-res, x0=np.zeros_like(res))
+            # Converged once the full (undamped) Newton step is small
+            dx_norm = np.sum(np.absolute(x**2 - (x + dx)**2))
+            if dx_norm < self.settings['r_tolerance']:
+                break
+            # Backtracking line search
+            alpha = 1.0
+            while True:
+                x_new = x + alpha*dx
+                res_new = self._get_residual(A=A, b=b, x=x_new)
+                res_new_norm = np.linalg.norm(res_new)
+                if res_new_norm <= (1 - 1e-4*alpha)*res_norm:
+                    break
+                if alpha <= min_step:
+                    stalled = True
+                    break
+                alpha = alpha/2
+            if stalled:
+                # Keep the last iterate, and the source terms evaluated at it
+                logger.info('Newton step ' + str(itr) + ' stalled at a ' +
+                            'step length of ' + str(alpha))
+                self._get_residual(A=A, b=b, x=x)
+                break
+            logger.info('Newton step ' + str(itr) + ', step length: ' +
+                        str(alpha) + ', residual: ' + str(res_new_norm))
+            residuals.append(res_new_norm)
+            x, res, res_norm = x_new, res_new, res_new_norm
+            if self.settings['sources'] == []:
+                break
+        converged = (dx_norm < self.settings['r_tolerance'] and
+                     not stalled) or (self.settings['sources'] == [])
+        self.convergence = {'iterations': len(residuals),
+                            'residuals': residuals,
+                            'converged': converged}
+        return x
+
+    def _get_residual(self, A, b, x):
+        r"""
+        Updates the source terms at the given value of 'quantity' and returns
+        the residual of the nonlinear system, A*x - b - rate(x), where 'A' and
+        'b' already have the boundary conditions applied.
+        """
+        phase = self.project.phases()[self.settings['phase']]
+        self[self.settings['quantity']] = x
+        self._update_physics()
+        res = A*x - b
+        for item in self.settings['sources']:
+            Ps = self.pores(item)
+            res[Ps] = res[Ps] - phase[item+'.'+'rate'][Ps]
+        return res
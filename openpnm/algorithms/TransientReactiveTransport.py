@@ -2,7 +2,7 @@ import numpy as np
 import scipy.sparse as sprs
 from decimal import Decimal as dc
 from openpnm.algorithms import ReactiveTransport
-from openpnm.utils import logging
+from openpnm.utils import logging, profiled, TimeSeries
 logger = logging.getLogger(__name__)
 
 
@@ -38,6 +38,15 @@ class TransientReactiveTransport(ReactiveTransport):
                    'r_tolerance': 1e-04,
                    't_precision': 12,
                    't_scheme': 'implicit',
+                   't_adaptive': False,
+                   't_adaptive_tol': 1e-03,
+                   't_step_min': None,
+                   't_step_max': None,
+                   't_output_dtype': float,
+                   't_output_file': None,
+                   't_output_compression': None,
+                   't_output_in_memory': True,
+                   't_checkpoint': None,
                    'gui': {'setup':        {'phase': None,
                                             'quantity': '',
                                             'conductance': '',
@@ -61,6 +70,7 @@ class TransientReactiveTransport(ReactiveTransport):
         self.settings.update(def_set)
         self.settings.update(settings)
         self._A_steady = None  # Initialize the steady sys of eqs A matrix
+        self.time_series = None  # Initialize the transient outputs
         if phase is not None:
             self.setup(phase=phase)
 
@@ -128,6 +138,49 @@ class TransientReactiveTransport(ReactiveTransport):
             order accurate) and 'cranknicolson' (slow, 2nd order accurate) both
             for transient simulations. The default value is 'implicit'.
 
+        t_adaptive : boolean
+            If ``True`` the time step is adjusted during the simulation,
+            starting from 't_step'.  The step is halved and repeated whenever
+            the estimated local error exceeds 't_adaptive_tol', and doubled
+            when it is well below it.  Output times are always hit exactly.
+            The default value is ``False``.
+
+        t_adaptive_tol : scalar
+            The largest local error accepted in one time step, relative to the
+            largest magnitude of 'quantity'.  The default value is 1e-03.
+
+        t_step_min : scalar
+            The smallest time step allowed when 't_adaptive' is ``True``.  The
+            default is 't_step' / 1024.
+
+        t_step_max : scalar
+            The largest time step allowed when 't_adaptive' is ``True``.  The
+            default is no limit other than the output times.
+
+        t_output_dtype : data-type
+            The type used to store the transient solutions.  The default is
+            ``float``, and ``float32`` halves their memory.
+
+        t_output_file : string
+            The name of an HDF5 file to which each transient solution is
+            appended as soon as it is computed.  The default is ``None``.
+
+        t_output_compression : string
+            The compression filter applied in 't_output_file', such as
+            'gzip'.  The default is ``None``.
+
+        t_output_in_memory : boolean
+            If ``False`` the transient solutions are only kept in
+            't_output_file', so memory does not grow with the number of
+            outputs.  The default is ``True``.
+
+        t_checkpoint : scalar
+            The interval of simulated time between the checkpoints written to
+            't_output_file', in addition to those written with each output,
+            so that a run with few output times can still be resumed close to
+            where it stopped.  The default is ``None``, meaning checkpoints
+            are only written with the outputs.
+
         Notes
         -----
         More settings can be adjusted in the presence of a non-linear source
@@ -171,13 +224,15 @@ class TransientReactiveTransport(ReactiveTransport):
         converted_array = self[self.settings['quantity']].astype('float64')
         self[self.settings['quantity']] = converted_array
 
-    def _t_update_A(self):
+    def _t_update_A(self, dt=None):
         r"""
         A method to update 'A' matrix at each time step according to 't_scheme'
+        using the time step 'dt', which defaults to 't_step'
         """
         network = self.project.network
         Vi = network['pore.volume']
-        dt = self.settings['t_step']
+        if dt is None:
+            dt = self.settings['t_step']
         s = self.settings['t_scheme']
         if (s == 'implicit'):
             f1, f2 = 1, 1
@@ -185,24 +240,36 @@ class TransientReactiveTransport(ReactiveTransport):
             f1, f2 = 0.5, 1
         elif (s == 'steady'):
             f1, f2 = 1, 0
+        pattern = getattr(self._A_steady, '_pattern', None)
+        if pattern is not None:
+            # The Laplacian pattern holds every diagonal entry, so A can be
+            # updated in-place, keeping the pattern that _apply_BCs caches
+            A = self._A_steady.copy()
+            A.data *= f1
+            A.setdiag(A.diagonal() + (f2/dt)*Vi)
+            A._pattern = pattern
+            self._A = A
+            return A
         # Compute A (operations involve conversion to 'csr')
         A = ((f2/dt) * sprs.coo_matrix.multiply(
             sprs.coo_matrix(np.reshape(Vi, (self.Np, 1)), shape=(self.Np,)),
             sprs.identity(self.Np, format='coo')) + f1 * self._A_steady)
-        # Convert A to 'coo' format to apply BCs
-        A = sprs.coo_matrix(A)
+        # Convert A to 'csr' format to apply BCs
+        A = sprs.csr_matrix(A)
         self._A = A
         return A
 
-    def _t_update_b(self):
+    def _t_update_b(self, dt=None):
         r"""
         A method to update 'b' array at each time step according to
-        't_scheme' and the source term value
+        't_scheme' and the source term value, using the time step 'dt', which
+        defaults to 't_step'
         """
         network = self.project.network
         phase = self.project.phases()[self.settings['phase']]
         Vi = network['pore.volume']
-        dt = self.settings['t_step']
+        if dt is None:
+            dt = self.settings['t_step']
         s = self.settings['t_scheme']
         if (s == 'implicit'):
             f1, f2, f3 = 1, 1, 0
@@ -222,7 +289,8 @@ class TransientReactiveTransport(ReactiveTransport):
         self._b = b
         return b
 
-    def run(self, t=None):
+    @profiled
+    def run(self, t=None, resume=False):
         r"""
         Builds 'A' matrix of the steady system of equations to be used at each
         time step to build transient 'A' and 'b'. Imposes the initial
@@ -234,11 +302,29 @@ class TransientReactiveTransport(ReactiveTransport):
         t : scalar
             The time to start the simulation from. If no time is specified, the
             simulation starts from 't_initial' defined in the settings.
+
+        resume : boolean
+            If ``True`` the simulation restarts from the last checkpoint
+            stored in 't_output_file', taking the solution, time and time
+            step from it, and appends further outputs to the same file.
+            ``t`` is ignored.  The default is ``False``.
+
+        Notes
+        -----
+        When 't_output_file' is given, a checkpoint containing the current
+        solution, time and time step is written to it along with each output,
+        and every 't_checkpoint' if given, so a simulation that was
+        interrupted can be continued with ``run(resume=True)``.
         """
         logger.info('―'*80)
         logger.info('Running TransientTransport')
+        if self.settings['matrix_free']:
+            raise Exception('matrix_free is not supported for transient ' +
+                            'simulations')
+        if resume:
+            t = self._resume()
         # If solver used in steady mode, no need to add ICs
-        if (self.settings['t_scheme'] == 'steady'):
+        if (self.settings['t_scheme'] == 'steady') and not resume:
             self[self.settings['quantity']] = 0.0
         # If ICs are not defined, assume zero
         try:
@@ -247,6 +333,8 @@ class TransientReactiveTransport(ReactiveTransport):
             self.set_IC(0)
         # Save A matrix of the steady sys of eqs (WITHOUT BCs applied)
         self._A_steady = (self.A).copy()
+        if hasattr(self.A, '_pattern'):
+            self._A_steady._pattern = self.A._pattern
         # Initialize A and b with BCs applied
         self._t_update_A()
         self._t_update_b()
@@ -255,6 +343,9 @@ class TransientReactiveTransport(ReactiveTransport):
         self._b_t = (self._b).copy()
         if t is None:
             t = self.settings['t_initial']
+        # Create the store for the transient solutions
+        if not resume:
+            self._open_time_series(overwrite=True)
         # Create S1 & S1 for 1st Picard's iteration
         self._update_physics()
 
@@ -276,12 +367,11 @@ class TransientReactiveTransport(ReactiveTransport):
 
         Notes
         -----
-        Transient solutions are stored on the object under
-        ``pore.quantity_timeStepIndex`` where *quantity* is specified in the
-        ``settings`` attribute. Initial field is stored as
-        ``pore.quantity_initial``. Steady-state solution (if reached) is stored
-        as ``pore.quantity_steady``. Current solution is stored as
-        ``pore.quantity``.
+        Transient solutions, including the initial and steady-state fields,
+        are stored in the ``time_series`` attribute, one row per output time,
+        and can be retrieved with ``results``. Current solution is stored as
+        ``pore.quantity`` where *quantity* is specified in the ``settings``
+        attribute.
         """
         tf = self.settings['t_final']
         dt = self.settings['t_step']
@@ -289,7 +379,13 @@ class TransientReactiveTransport(ReactiveTransport):
         tol = self.settings['t_tolerance']
         t_pre = self.settings['t_precision']
         s = self.settings['t_scheme']
+        tc = self.settings['t_checkpoint']
         res_t = 1e+06  # Initialize the residual
+        # Output times count from the start of the run, even when resumed
+        t0 = self.time_series.times[0] if len(self.time_series) else t
+
+        if self.settings['t_adaptive'] and (s != 'steady'):
+            return self._run_transient_adaptive(t=t)
 
         if not isinstance(to, list):
             # Make sure 'tf' and 'to' are multiples of 'dt'
@@ -297,7 +393,7 @@ class TransientReactiveTransport(ReactiveTransport):
             to = to + (dt-(to % dt))*((to % dt) != 0)
             self.settings['t_final'] = tf
             self.settings['t_output'] = to
-            out = np.arange(t+to, tf, to)
+            out = np.arange(t0+to, tf, to)
         else:
             out = np.array(to)
         out = np.append(out, tf)
@@ -311,12 +407,10 @@ class TransientReactiveTransport(ReactiveTransport):
             x_new = self[self.settings['quantity']]
 
         else:  # Do time iterations
-            # Export the initial field (t=t_initial)
-            n = int(-dc(str(round(t, t_pre))).as_tuple().exponent *
-                    (round(t, t_pre) != int(t)))
-            t_str = (str(int(round(t, t_pre)*10**n))+('e-'+str(n))*(n != 0))
-            quant_init = self[self.settings['quantity']]
-            self[self.settings['quantity']+'@'+t_str] = quant_init
+            # Export the initial field (t=t_initial), unless resuming
+            if len(self.time_series) == 0:
+                self._store_output(t, self[self.settings['quantity']])
+            t_ck = t
             for time in np.arange(t+dt, tf+dt, dt):
                 if (res_t >= tol):  # Check if the steady state is reached
                     logger.info('    Current time step: '+str(time)+' s')
@@ -329,13 +423,13 @@ class TransientReactiveTransport(ReactiveTransport):
                     # Output transient solutions. Round time to ensure every
                     # value in outputs is exported.
                     if round(time, t_pre) in out:
-                        n = int(-dc(str(round(time, t_pre))).as_tuple().exponent *
-                                (round(time, t_pre) != int(time)))
-                        t_str = (str(int(round(time, t_pre)*10**n)) +
-                                 ('e-'+str(n))*(n != 0))
-                        self[self.settings['quantity']+'@'+t_str] = x_new
+                        self._store_output(time, x_new)
                         logger.info('        Exporting time step: ' +
                                     str(time)+' s')
+                        t_ck = time
+                    elif tc and (round(time - t_ck, t_pre) >= tc):
+                        self._store_checkpoint(time, x_new)
+                        t_ck = time
                     # Update A and b and apply BCs
                     self._t_update_A()
                     self._t_update_b()
@@ -345,11 +439,7 @@ class TransientReactiveTransport(ReactiveTransport):
 
                 else:  # Stop time iterations if residual < t_tolerance
                     # Output steady state solution
-                    n = int(-dc(str(round(time, t_pre))).as_tuple().exponent *
-                            (round(time, t_pre) != int(time)))
-                    t_str = (str(int(round(time, t_pre)*10**n)) +
-                             ('e-'+str(n))*(n != 0))
-                    self[self.settings['quantity']+'@'+t_str] = x_new
+                    self._store_output(time, x_new)
                     logger.info('        Exporting time step: '+str(time)+' s')
                     break
             if (round(time, t_pre) == tf):
@@ -358,6 +448,186 @@ class TransientReactiveTransport(ReactiveTransport):
                 logger.info('    Transient solver converged after: ' +
                             str(time)+' s')
 
+    def _run_transient_adaptive(self, t):
+        """r
+        Performs a transient simulation like '_run_transient', but adjusts the
+        time step to keep the estimated local error below 't_adaptive_tol'.
+
+        Parameters
+        ----------
+        t : scalar
+            The time to start the simulation from.
+
+        Notes
+        -----
+        The local error is estimated without extra solves, as half the
+        difference between the solution of each step and its linear
+        extrapolation from the two previous steps.  This is exact to leading
+        order for the 'implicit' scheme and conservative for
+        'cranknicolson'.  A step is repeated with half the time step when the
+        error is too large, and the time step is doubled when the error falls
+        below a quarter of the tolerance, so it otherwise stays constant and
+        the cached factorization of 'A' can be reused (see ``_get_solver``).
+        Steps are shortened as needed to land exactly on the output times.
+
+        The steady-state residual compared with 't_tolerance' is the change
+        in one step scaled to a step of 't_step', so it does not depend on the
+        current time step.  Once it is reached, the steady solution is also
+        stored at the remaining output times.
+        """
+        tf = self.settings['t_final']
+        to = self.settings['t_output']
+        tol = self.settings['t_tolerance']
+        t_pre = self.settings['t_precision']
+        err_tol = self.settings['t_adaptive_tol']
+        dt = self.settings['t_step']
+        dt_ref = dt
+        dt_min = self.settings['t_step_min'] or dt/1024
+        dt_max = self.settings['t_step_max'] or np.inf
+        tc = self.settings['t_checkpoint']
+        quantity = self.settings['quantity']
+        # Output times count from the start of the run, even when resumed
+        t0 = self.time_series.times[0] if len(self.time_series) else t
+
+        if not isinstance(to, list):
+            out = np.arange(t0+to, tf, to)
+        else:
+            out = np.array(to)
+        out = np.append(out, tf)
+        out = np.unique(np.around(out, decimals=t_pre))
+
+        # Export the initial field (t=t_initial), unless resuming
+        if len(self.time_series) == 0:
+            self._store_output(t, self[quantity])
+        t_ck = t
+        x_prev, dt_prev = None, None
+        res_t = 1e+06
+        while (round(t, t_pre) < tf) and (res_t >= tol):
+            t_next = out[out > round(t, t_pre)][0]
+            h = min(dt, t_next - t)
+            x_old = self[quantity].copy()
+            self[quantity] = x_old
+            self._t_update_A(dt=h)
+            self._t_update_b(dt=h)
+            self._apply_BCs()
+            self._A_t = (self._A).copy()
+            self._b_t = (self._b).copy()
+            self._t_run_reactive(x=x_old)
+            x_new = self[quantity]
+            # Estimate the local error from a linear extrapolation
+            err = None
+            if x_prev is not None:
+                x_pred = x_old + (h/dt_prev)*(x_old - x_prev)
+                scale = np.abs(x_new).max() or 1.0
+                err = 0.5*np.abs(x_new - x_pred).max()/scale
+                if (err > err_tol) and (h > dt_min):
+                    logger.info('    Rejected time step: ' + str(h) +
+                                ' s, error: ' + str(err))
+                    self[quantity] = x_old
+                    dt = max(h/2, dt_min)
+                    continue
+            t = round(t + h, t_pre)
+            logger.info('    Current time step: ' + str(t) + ' s')
+            # Scale the change to a step of 't_step', so that shorter steps
+            # are not mistaken for a steady state
+            res_t = np.sum(np.absolute(x_old**2 - x_new**2))*(dt_ref/h)
+            logger.info('        Residual: ' + str(res_t))
+            if (t in out) or (res_t < tol):
+                self._store_output(t, x_new, dt=dt)
+                logger.info('        Exporting time step: ' + str(t) + ' s')
+                t_ck = t
+            elif tc and (round(t - t_ck, t_pre) >= tc):
+                self._store_checkpoint(t, x_new, dt=dt)
+                t_ck = t
+            x_prev, dt_prev = x_old, h
+            if (err is not None) and (err < err_tol/4) and (h == dt):
+                dt = min(2*dt, dt_max)
+        if res_t >= tol:
+            logger.info('    Maximum time step reached: ' + str(t) + ' s')
+        else:
+            logger.info('    Transient solver converged after: ' +
+                        str(t) + ' s')
+            # The solution no longer changes, so it is also the solution at
+            # the output times that were not reached
+            for time in out[(out > t) & (out < tf)]:
+                self._store_output(time, self[quantity], dt=dt)
+
+    def _store_output(self, time, x, dt=None):
+        r"""
+        Appends the solution at the given time to ``time_series``, unless it
+        is already the last one stored, and saves the checkpoint needed to
+        resume from it
+        """
+        t_pre = self.settings['t_precision']
+        time = round(time, t_pre)
+        ts = self.time_series
+        if (len(ts) == 0) or (round(ts.times[-1], t_pre) != time):
+            ts.append(time, x)
+        self._store_checkpoint(time, x, dt=dt)
+
+    def _store_checkpoint(self, time, x, dt=None):
+        r"""
+        Saves the solution, time and time step needed to resume the
+        simulation from the given time, without adding it to the outputs
+        """
+        if dt is None:
+            dt = self.settings['t_step']
+        time = round(time, self.settings['t_precision'])
+        self.time_series.set_state(x=x, t=time, dt=dt)
+
+    def _open_time_series(self, overwrite):
+        r"""
+        Creates the ``time_series`` for the transient solutions according to
+        the 't_output_*' settings, reopening the series in 't_output_file'
+        unless ``overwrite`` is ``True``
+        """
+        if self.time_series is not None:
+            self.time_series.close()
+        self.time_series = TimeSeries(
+            N=self.Np, dtype=self.settings['t_output_dtype'],
+            filename=self.settings['t_output_file'],
+            name=self.settings['quantity'],
+            compression=self.settings['t_output_compression'],
+            in_memory=self.settings['t_output_in_memory'] is not False,
+            overwrite=overwrite)
+
+    def _resume(self):
+        r"""
+        Reopens 't_output_file' and restores the solution and time step from
+        its last checkpoint, returning the time at which it was written
+        """
+        if self.settings['t_output_file'] is None:
+            raise Exception('t_output_file must be given to resume a run')
+        self._open_time_series(overwrite=False)
+        state = self.time_series.get_state()
+        if not state:
+            raise Exception('No checkpoint found in ' +
+                            str(self.settings['t_output_file']))
+        self.set_IC(state['x'])
+        self.settings['t_step'] = float(state['dt'])
+        logger.info('    Resuming from checkpoint at: ' + str(state['t']) +
+                    ' s')
+        return float(state['t'])
+
+    def _get_outputs(self):
+        outputs = super()._get_outputs()
+        if self.time_series is not None:
+            quantity = self.settings['quantity']
+            for t, x in zip(self.time_series.times, self.time_series.data):
+                outputs[quantity+'@'+self._t_str(float(t))] = x
+        return outputs
+
+    def _t_str(self, time):
+        r"""
+        Returns the given time as a string with 't_precision' decimals, as
+        used in the keys of the stored transient solutions
+        """
+        t_pre = self.settings['t_precision']
+        n = int(-dc(str(round(time, t_pre))).as_tuple().exponent *
+                (round(time, t_pre) != int(time)))
+        t_str = (str(int(round(time, t_pre)*10**n)) + ('e-'+str(n))*(n != 0))
+        return t_str
+
     def _t_run_reactive(self, x):
         """r
         Repeatedly updates transient 'A', 'b', and the solution guess within
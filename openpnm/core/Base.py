@@ -1,10 +1,12 @@
 from collections import namedtuple
+from itertools import count
 import matplotlib.pyplot as plt
 from openpnm.utils import Workspace, logging
 from openpnm.utils.misc import PrintableList, SettingsDict, HealthDict
 import scipy as sp
 logger = logging.getLogger(__name__)
 ws = Workspace()
+_serials = count()
 
 
 class Base(dict):
@@ -142,8 +144,29 @@ class Base(dict):
         # It is necessary to set the SettingsDict here since some classes
         # use it before calling super.__init__()
         instance.settings = SettingsDict()
+        # Write counters for each key, used to detect stale model data
+        instance._versions = {}
+        # Unlike id(), this is never reused by another object, so together
+        # with the write counters it identifies the state of a key
+        instance._serial = next(_serials)
+        # Back-reference to the Project, which is set by Project.extend and
+        # set to False when the object is purged or its Project is closed
+        instance._project = None
+        # Full domain buffers shared with Subdomains by interleave_data
+        instance._interleaved = {}
+        # Query results stored by _get_indices
+        instance._label_cache = {}
         return instance
 
+    def __getstate__(self):
+        # Don't store the Project along with the object when pickling
+        state = self.__dict__.copy()
+        state.pop('_project', None)
+        state.pop('_interleaved', None)
+        state.pop('_label_cache', None)
+        state.pop('_serial', None)  # A copy gets its own from __new__
+        return state
+
     def __init__(self, Np=0, Nt=0, name=None, project=None):
         self.settings.setdefault('prefix', 'base')
         super().__init__()
@@ -174,12 +197,14 @@ class Base(dict):
         """
         # If value is a dictionary, then break it up into constituent arrays
         if hasattr(value, 'keys'):
+            self._bump_version(key)
             for item in value.keys():
                 prop = item.replace('pore.', '').replace('throat.', '')
                 self.__setitem__(key+'.'+prop, value[item])
             return
 
         value = sp.array(value, ndmin=1)  # Convert value to an ndarray
+        self._bump_version(key)
 
         # Enforce correct dict naming
         element = key.split('.')[0]
@@ -214,6 +239,26 @@ class Base(dict):
             else:
                 raise Exception('Cannot write array, wrong length: '+key)
 
+    def _bump_version(self, key):
+        r"""
+        Increments the write counter of the given key.  This is called each
+        time data is written via ``__setitem__`` so that models can tell
+        whether their inputs have changed since they were last run.  Writing
+        a sub-key such as ``'throat.conduit_lengths.pore1'`` also increments
+        the counter of ``'throat.conduit_lengths'``.
+        """
+        self._versions[key] = self._versions.get(key, 0) + 1
+        parent = '.'.join(key.split('.')[:2])
+        if parent != key:
+            self._versions[parent] = self._versions.get(parent, 0) + 1
+
+    def _get_version(self, key):
+        r"""
+        Returns the number of times the given key has been written on this
+        object, or 0 if it has never been written.
+        """
+        return self._versions.get(key, 0)
+
     def _set_name(self, name, validate=True):
         if not hasattr(self, '_name'):
             self._name = None
@@ -231,6 +276,8 @@ class Base(dict):
                 if 'throat.'+self.name in item.keys():
                     item['throat.'+name] = item.pop('throat.'+self.name)
         self._name = name
+        if self.project is not None:
+            self.project._invalidate_cache()
 
     def _get_name(self):
         if not hasattr(self, '_name'):
@@ -240,9 +287,19 @@ class Base(dict):
     name = property(_get_name, _set_name)
 
     def _get_project(self):
-        for proj in ws.values():
-            if self in proj:
-                return proj
+        proj = getattr(self, '_project', None)
+        if proj is None:
+            # Fall back to searching the Workspace, for objects that were
+            # created before the back-reference existed
+            for item in ws.values():
+                if self in item:
+                    self._project = item
+                    return item
+            self._project = False
+        if proj is False:
+            # The object was removed from its Project
+            return None
+        return proj
 
     project = property(fget=_get_project)
 
@@ -657,46 +714,49 @@ class Base(dict):
         if element+'.all' not in self.keys():
             raise Exception('Cannot proceed without {}.all'.format(element))
 
-        # Begin computing label array
+        allowed = ['or', 'any', 'union', 'and', 'all', 'intersection', 'xor',
+                   'exclusive_or', 'nor', 'not', 'none', 'nand', 'xnor',
+                   'nxor']
+        mode = self._parse_mode(mode, allowed=allowed, single=True)
+        keys = [element+'.'+item.split('.')[-1] for item in labels]
+
+        # Use the stored result if none of the labels have been written since
+        stamp = None
+        if self.settings['cache_label_queries'] and \
+                all([key in self.keys() for key in keys]):
+            stamp = tuple([(id(self[key]), self._get_version(key))
+                           for key in keys])
+            stamp = (self._count(element), stamp)
+            query = (element, tuple(keys), mode)
+            cached = self._label_cache.get(query)
+            if (cached is not None) and (cached[0] == stamp):
+                return cached[1].copy()
+
+        # Count the number of given labels applied to each location
+        count = sp.zeros_like(self[element+'.all'], dtype=int)
+        if len(keys) > 0:
+            stack = sp.vstack([self[key] for key in keys]).astype(bool)
+            count = sp.sum(stack, axis=0)
+        # Convert counts into a boolean mask depending on the mode
+        n = len(keys)
         if mode in ['or', 'any', 'union']:
-            union = sp.zeros_like(self[element+'.all'], dtype=bool)
-            for item in labels:  # Iterate over labels and collect all indices
-                union = union + self[element+'.'+item.split('.')[-1]]
-            ind = union
+            ind = count > 0
         elif mode in ['and', 'all', 'intersection']:
-            intersect = sp.ones_like(self[element+'.all'], dtype=bool)
-            for item in labels:  # Iterate over labels and collect all indices
-                intersect = intersect*self[element+'.'+item.split('.')[-1]]
-            ind = intersect
+            ind = count == n
         elif mode in ['xor', 'exclusive_or']:
-            xor = sp.zeros_like(self[element+'.all'], dtype=int)
-            for item in labels:  # Iterate over labels and collect all indices
-                info = self[element+'.'+item.split('.')[-1]]
-                xor = xor + sp.int8(info)
-            ind = (xor == 1)
+            ind = count == 1
         elif mode in ['nor', 'not', 'none']:
-            nor = sp.zeros_like(self[element+'.all'], dtype=int)
-            for item in labels:  # Iterate over labels and collect all indices
-                info = self[element+'.'+item.split('.')[-1]]
-                nor = nor + sp.int8(info)
-            ind = (nor == 0)
+            ind = count == 0
         elif mode in ['nand']:
-            nand = sp.zeros_like(self[element+'.all'], dtype=int)
-            for item in labels:  # Iterate over labels and collect all indices
-                info = self[element+'.'+item.split('.')[-1]]
-                nand = nand + sp.int8(info)
-            ind = (nand < len(labels)) * (nand > 0)
+            ind = (count < n) * (count > 0)
         elif mode in ['xnor', 'nxor']:
-            xnor = sp.zeros_like(self[element+'.all'], dtype=int)
-            for item in labels:  # Iterate over labels and collect all indices
-                info = self[element+'.'+item.split('.')[-1]]
-                xnor = xnor + sp.int8(info)
-            ind = (xnor > 1)
-        else:
-            raise Exception('Unsupported mode: '+mode)
+            ind = count > 1
         # Extract indices from boolean mask
         ind = sp.where(ind)[0]
         ind = ind.astype(dtype=int)
+        if stamp is not None:
+            self._label_cache[query] = (stamp, ind)
+            ind = ind.copy()
         return ind
 
     def pores(self, labels='all', mode='or', asmask=False):
@@ -754,6 +814,12 @@ class Base(dict):
         the result a a boolean mask (``asmask=True``), then manipulate the
         arrays manually.
 
+        If ``settings['cache_label_queries']`` is ``True`` the result of
+        each query is stored for reuse until one of the labels is written.
+        Note that changing the values of a label array *in-place* is not
+        detected, so labels should be reassigned after such changes, for
+        instance with ``pn['pore.top'] = pn['pore.top']``.
+
         Examples
         --------
         >>> import openpnm as op
@@ -1028,6 +1094,18 @@ class Base(dict):
         Float and boolean data is fine, but missing ints are converted to float
         when nans are inserted.
 
+        If ``settings['interleave_views']`` is ``True`` on the calling object,
+        the full length array is kept and the arrays on each associated
+        object are replaced by views into it, so subsequent reads on either
+        side return the same memory without copying.  This is only possible
+        when each object occupies a contiguous block of locations and all
+        objects hold data of the same type; otherwise a copy is made on each
+        call as usual and an info message is logged.  The shared array is
+        returned as a read-only view, since writing through it would change
+        the data on the associated objects without marking it as written, so
+        ``skip_clean_models`` would not rerun the models that depend on it.
+        Data should be written to the associated objects instead.
+
         Examples
         --------
         >>> import openpnm as op
@@ -1066,12 +1144,28 @@ class Base(dict):
             raise Exception('Unrecognized object type, cannot find dependents')
 
         # Attempt to fetch the requested array from each object
+        for item in sources:
+            if (prop not in item.keys()) and hasattr(item, '_run_lazy_model'):
+                item._run_lazy_model(prop)
         arrs = [item.get(prop, None) for item in sources]
-        locs = [self._get_indices(element, item.name) for item in sources]
+        locs = []
+        for item in sources:
+            if item._isa() in ['geometry', 'physics']:
+                locs.append(item._get_locations(element))
+            else:
+                locs.append(self._get_indices(element, item.name))
         sizes = [sp.size(a) for a in arrs]
         if sp.all([item is None for item in arrs]):  # prop not found anywhere
             raise KeyError(prop)
 
+        # Return the shared buffer if none of the sources have changed
+        if self.settings['interleave_views']:
+            stamp = self._interleave_stamp(prop, element, sources)
+            cached = self._interleaved.get(prop)
+            if (cached is not None) and (cached[0] == stamp):
+                if cached[1] is not None:
+                    return cached[1]
+
         # Check the general type of each array
         atype = []
         for a in arrs:
@@ -1109,8 +1203,60 @@ class Base(dict):
                 temp_arr[inds] = vals
             else:
                 temp_arr[inds] = dummy_val[atype[0]]
+
+        # Share the new array with the sources if possible
+        if self.settings['interleave_views']:
+            cached = self._interleaved.get(prop)
+            if self._share_interleaved(prop, temp_arr, sources, locs):
+                stamp = self._interleave_stamp(prop, element, sources)
+                temp_arr = temp_arr.view()
+                temp_arr.flags.writeable = False
+                self._interleaved[prop] = (stamp, temp_arr)
+            else:
+                if (cached is None) or (cached[0] != stamp):
+                    logger.info(prop + ' cannot be shared with ' +
+                                str([item.name for item in sources]) +
+                                ', a copy will be made on each call')
+                self._interleaved[prop] = (stamp, None)
         return temp_arr
 
+    def _interleave_stamp(self, prop, element, sources):
+        r"""
+        Returns a tuple that identifies the current state of ``prop`` on each
+        of the given sources, and of the locations they occupy.
+        """
+        stamp = []
+        for item in sources:
+            stamp.append((id(item), id(item.get(prop)),
+                          item._get_version(prop),
+                          self._get_version(element+'.'+item.name)))
+        stamp.append(self._count(element))
+        return tuple(stamp)
+
+    def _share_interleaved(self, prop, arr, sources, locs):
+        r"""
+        Replaces ``prop`` on each source with a view into ``arr``, provided
+        that every source holds the data in a contiguous block of locations
+        with a matching data type.  Returns ``True`` if successful.
+        """
+        blocks = []
+        for item, inds in zip(sources, locs):
+            vals = item.get(prop)
+            if (vals is None) or (vals.dtype != arr.dtype):
+                return False
+            if len(inds) == 0:
+                continue
+            start, stop = inds[0], inds[-1] + 1
+            if (stop - start) != len(inds):
+                return False
+            blocks.append((item, start, stop))
+        if sum([stop - start for _, start, stop in blocks]) != len(arr):
+            return False
+        for item, start, stop in blocks:
+            # Bypass __setitem__ since the values themselves are unchanged
+            dict.__setitem__(item, prop, arr[start:stop])
+        return True
+
     def interpolate_data(self, propname):
         r"""
         Determines a pore (or throat) property as the average of it's
@@ -1,10 +1,101 @@
 import inspect
+import hashlib
+import threading
+import numpy as np
 import networkx as nx
-from openpnm.utils import PrintableDict, logging, Workspace
+from collections import OrderedDict
+from openpnm.utils import PrintableDict, logging, Workspace, profiling
 ws = Workspace()
 logger = logging.getLogger(__name__)
 
 
+class ModelCache(OrderedDict):
+    r"""
+    A least-recently-used store for the results of models, used when
+    ``settings['memoize_models']`` is ``True`` on an object.
+
+    The size of the store is bounded by two settings on the Workspace:
+    ``'model_cache_bytes'`` is the total size of the stored arrays (default
+    is 256 MB) and ``'model_cache_entries'`` is the number of stored results
+    (default is 256).  When either is exceeded the least recently used
+    results are discarded.
+
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+        self.nbytes = 0
+
+    def _limits(self):
+        max_bytes = ws.settings['model_cache_bytes']
+        max_entries = ws.settings['model_cache_entries']
+        if max_bytes is None:
+            max_bytes = 2**28
+        if max_entries is None:
+            max_entries = 256
+        return max_bytes, max_entries
+
+    def fetch(self, key):
+        r"""
+        Returns the result stored under ``key``, or ``None`` if not found.
+        """
+        with self._lock:
+            if key not in self.keys():
+                return None
+            self.move_to_end(key)
+            return self[key][0]
+
+    def store(self, key, vals):
+        r"""
+        Stores the given result, discarding old results to stay within the
+        size limits.
+        """
+        if isinstance(vals, dict):
+            size = sum([np.asarray(v).nbytes for v in vals.values()])
+        else:
+            size = np.asarray(vals).nbytes
+        max_bytes, max_entries = self._limits()
+        if size > max_bytes:
+            return
+        with self._lock:
+            if key in self.keys():
+                self.nbytes -= self.pop(key)[1]
+            self[key] = (vals, size)
+            self.nbytes += size
+            while (self.nbytes > max_bytes) or (len(self) > max_entries):
+                self.nbytes -= self.popitem(last=False)[1][1]
+
+    def clear(self):
+        with self._lock:
+            super().clear()
+            self.nbytes = 0
+
+
+def _fingerprint(value):
+    r"""
+    Converts a model argument into a hashable value, with arrays reduced to
+    a digest of their contents.  Raises a ``TypeError`` if this is not
+    possible.
+    """
+    if isinstance(value, np.ndarray):
+        if value.dtype.hasobject:
+            raise TypeError('Cannot fingerprint arrays of objects')
+        data = np.ascontiguousarray(value)
+        digest = hashlib.blake2b(data.view(np.uint8), digest_size=16)
+        return ('array', value.shape, value.dtype.str, digest.hexdigest())
+    if isinstance(value, (list, tuple)):
+        return (type(value).__name__, tuple(_fingerprint(v) for v in value))
+    if isinstance(value, dict):
+        items = sorted(value.items())
+        return ('dict', tuple((k, _fingerprint(v)) for k, v in items))
+    hash(value)  # Raises a TypeError if value is not hashable
+    return value
+
+
+_model_cache = ModelCache()
+
+
 class ModelsDict(PrintableDict):
     r"""
     This subclassed dictionary is assigned to the ``models`` attribute of
@@ -16,8 +107,46 @@ class ModelsDict(PrintableDict):
     order in which models should be called: ``dependency_list``,
     ``dependency_graph``, and ``dependency_map``.
 
+    The order of the models is resolved once and stored along with the
+    arguments of each model, as an execution plan which is reused until a
+    model is added, removed, or has one of its parameters changed.
+
     """
 
+    def __setstate__(self, state):
+        # The stored plan refers to object ids so must not be restored
+        state = dict(state)
+        state.pop('_plan', None)
+        self.__dict__.update(state)
+
+    def _signature(self):
+        r"""
+        Returns a tuple identifying the current models and parameters, used
+        to tell when the execution plan must be rebuilt.
+        """
+        return tuple((k, tuple((p, id(v)) for p, v in self[k].items()))
+                     for k in self.keys())
+
+    def _get_plan(self):
+        r"""
+        Returns the execution plan, which is a list of tuples containing the
+        propname, model function, regeneration mode and remaining keyword
+        arguments of each model, in the order they should be run.
+        """
+        signature = self._signature()
+        plan = getattr(self, '_plan', None)
+        if (plan is None) or (plan[0] != signature):
+            order = self._resolve_order()
+            steps = []
+            for propname in order:
+                kwargs = self[propname].copy()
+                model = kwargs.pop('model')
+                regen_mode = kwargs.pop('regen_mode', None)
+                steps.append((propname, model, regen_mode, kwargs))
+            plan = (signature, steps)
+            self._plan = plan
+        return plan[1]
+
     def dependency_list(self):
         r'''
         Returns a list of dependencies in the order with which they should be
@@ -37,6 +166,12 @@ class ModelsDict(PrintableDict):
         dependency_map
 
         '''
+        return [step[0] for step in self._get_plan()]
+
+    def _resolve_order(self):
+        r"""
+        Sorts the models topologically using the dependency graph.
+        """
         dtree = self.dependency_graph()
         cycles = list(nx.simple_cycles(dtree))
         if cycles:
@@ -201,6 +336,12 @@ class ModelsMixin():
             *'deferred'* Is not run upon being assigned, but is run the first
             time that ``regenerate_models`` is called.
 
+            *'lazy'* : Is only run when its data is requested from the object
+            (or from the Phase or Network for Physics and Geometry models).
+            Calling ``regenerate_models`` discards the existing data, so the
+            model is run again on the next request.  Any dependencies that
+            are also lazy models are run in turn as they are requested.
+
         """
         if propname in kwargs.values():  # Prevent infinite loops of look-ups
             raise Exception(propname+' can\'t be both dependency and propname')
@@ -215,7 +356,9 @@ class ModelsMixin():
                     kwargs.update({k: v})
         self.models[propname] = kwargs  # Store all keyword argumnents in model
         # Regenerate model values if necessary
-        if regen_mode not in ['deferred']:
+        if regen_mode == 'lazy':
+            self._discard_model_data(propname)
+        elif regen_mode not in ['deferred']:
             self._regen(propname)
 
     def regenerate_models(self, propnames=None, exclude=[], deep=False):
@@ -241,20 +384,46 @@ class ModelsMixin():
             The default is ``False``.  The method does not work in reverse,
             so regenerating models on a Physics will not update a Phase.
 
+        Notes
+        -----
+        If ``settings['skip_clean_models']`` is ``True`` on the object, then
+        only *dirty* models are re-run.  A model is dirty if one of the arrays
+        passed to it as an argument (e.g. ``pore_diameter='pore.diameter'``)
+        has been written on any object in the Project since the model last
+        ran, if its parameters were changed, or if its data was removed.  Only
+        dependencies given explicitly as arguments are tracked, and changes
+        made in-place (e.g. ``obj['pore.diameter'][0] = 1.0``) are not seen.
+
+        If ``settings['memoize_models']`` is ``True`` on the object, the
+        result of each model is stored in a shared cache, along with the write
+        counters of the arrays referred to by its arguments.  A model is not
+        run again if these arrays have not been written since and its
+        parameters are unchanged, in which case the stored result is used.
+        As above, changes made in-place are not seen.  This is only valid for
+        models that depend on nothing but their arguments.  The size of the
+        cache is controlled by the Workspace settings described in
+        ``ModelCache``.
+
+        When ``deep`` is ``True`` the associated objects can be regenerated
+        concurrently by setting ``settings['regen_threads']`` on the
+        Workspace to the number of threads to use.
+
         """
         # If empty list of propnames was given, do nothing and return
         if type(propnames) is list and len(propnames) == 0:
             return
         if type(propnames) is str:  # Convert string to list if necessary
             propnames = [propnames]
+        plan = self.models._get_plan()
+        self_models = [step[0] for step in plan]
         if propnames is None:  # If no props given, then regenerate them all
-            propnames = self.models.dependency_list()
+            propnames = self_models
             # If some props are to be excluded, remove them from list
             if len(exclude) > 0:
                 propnames = [i for i in propnames if i not in exclude]
         # Re-order given propnames according to dependency tree
-        self_models = self.models.dependency_list()
         propnames = [i for i in self_models if i in propnames]
+        steps = {step[0]: step for step in plan}
 
         if deep:
             other_models = None  # Will trigger regen of ALL models
@@ -265,29 +434,34 @@ class ModelsMixin():
         if self._isa('phase'):
             # Start be regenerating models on self
             for item in propnames:
-                self._regen(item)
+                self._regen(item, step=steps[item])
             # Then regen models on associated objects, if any in other_models
-            for phys in self.project.find_physics(phase=self):
-                phys.regenerate_models(propnames=other_models, deep=False)
+            physics = self.project.find_physics(phase=self)
+            self.project._regenerate_objects(physics, propnames=other_models)
         elif self._isa('network'):  # Repeat for other object types
             for item in propnames:
-                self._regen(item)
-            for geom in self.project.geometries().values():
-                geom.regenerate_models(propnames=other_models, deep=False)
+                self._regen(item, step=steps[item])
+            geometries = list(self.project.geometries().values())
+            self.project._regenerate_objects(geometries,
+                                             propnames=other_models)
         else:
             for item in propnames:
-                self._regen(item)
+                self._regen(item, step=steps[item])
 
-    def _regen(self, prop):
-        # Create a temporary dict of all model arguments
-        try:
-            kwargs = self.models[prop].copy()
-        except KeyError:
-            logger.info(prop+' not found, will retry if deep is True')
-            return
-        # Pop model and regen_mode from temporary dict
-        model = kwargs.pop('model')
-        regen_mode = kwargs.pop('regen_mode', None)
+    def _regen(self, prop, step=None, on_demand=False):
+        if step is None:
+            # Create a temporary dict of all model arguments
+            try:
+                kwargs = self.models[prop].copy()
+            except KeyError:
+                logger.info(prop+' not found, will retry if deep is True')
+                return
+            # Pop model and regen_mode from temporary dict
+            model = kwargs.pop('model')
+            regen_mode = kwargs.pop('regen_mode', None)
+        else:
+            # Use the arguments already resolved in the execution plan
+            _, model, regen_mode, kwargs = step
         # Only regenerate model if regen_mode is correct
         if self.settings['freeze_models']:
             # Don't run ANY models if freeze_models is set to True
@@ -295,14 +469,181 @@ class ModelsMixin():
         elif regen_mode == 'constant':
             # Only regenerate if data not already in dictionary
             if prop not in self.keys():
-                self[prop] = model(target=self, **kwargs)
+                with profiling(self, prop):
+                    self[prop] = model(target=self, **kwargs)
+        elif (regen_mode == 'lazy') and not on_demand:
+            # Discard data so the model is run when it's next requested
+            self._discard_model_data(prop)
+        elif self.settings['skip_clean_models'] and not self._is_dirty(prop):
+            # Inputs have not changed since the last run, so skip it
+            pass
         else:
             try:
-                self[prop] = model(target=self, **kwargs)
+                with profiling(self, prop):
+                    if self.settings['memoize_models']:
+                        vals = self._run_memoized(prop, model, kwargs)
+                    else:
+                        vals = model(target=self, **kwargs)
+                    self[prop] = vals
             except KeyError as e:
                 logger.error(prop + ' was not run since the following ' +
                              'property is missing: ' + e.__str__())
-                self.models[prop]['regen_mode'] = 'deferred'
+                if regen_mode != 'lazy':
+                    self.models[prop]['regen_mode'] = 'deferred'
+            else:
+                if self.settings['skip_clean_models']:
+                    self._stamp_model(prop)
+
+    def _run_memoized(self, prop, model, kwargs):
+        r"""
+        Runs the given model, or returns its result from a previous run if
+        its arguments, and the arrays they refer to, are unchanged.
+        """
+        key = self._memo_key(prop, model, kwargs)
+        if key is None:
+            return model(target=self, **kwargs)
+        vals = _model_cache.fetch(key)
+        if vals is None:
+            vals = model(target=self, **kwargs)
+            _model_cache.store(key, vals)
+        else:
+            logger.debug(prop + ' found in model cache, model was not run')
+        return vals
+
+    def _memo_key(self, prop, model, kwargs):
+        r"""
+        Generates the key under which a model's result is stored, consisting
+        of the target and its locations, the model function, the arguments and
+        the state of each array referred to by the arguments.  Returns
+        ``None`` if one of the arguments can't be reduced to a hashable value.
+
+        Notes
+        -----
+        The state of an array is given by its write counter and ``id`` on
+        each object in the Project through which it may be looked up, since
+        models on Subdomains often read their inputs from the full domain
+        (e.g. conduit properties include neighboring pores in other
+        Geometries).  Only arrays passed directly as arguments are hashed.
+        """
+        net = self.project.network
+        sources = [obj for obj in self.project if not obj._isa('algorithm')]
+        inputs = []
+        try:
+            for k, v in sorted(kwargs.items()):
+                inputs.append((k, _fingerprint(v)))
+                if isinstance(v, str) and \
+                        (v.split('.')[0] in ['pore', 'throat']):
+                    inputs.append((v, self._input_state(v, sources)))
+        except TypeError:
+            return None
+        target = [self._serial, self.name, self.Np, self.Nt,
+                  id(net['throat.conns']), net._get_version('throat.conns')]
+        boss = self.project.find_full_domain(self)
+        if boss is not self:
+            target.append(boss._serial)
+            target.append(boss._get_version('pore.' + self.name))
+            target.append(boss._get_version('throat.' + self.name))
+        return (tuple(target), prop, model, tuple(inputs))
+
+    def _input_state(self, prop, sources):
+        r"""
+        Returns the write counter and ``id`` of the given property on each of
+        the given objects.  The counter includes writes to any sub-keys (e.g.
+        ``'throat.conduit_lengths.pore1'``).
+        """
+        return tuple((obj._serial, obj._get_version(prop), id(obj.get(prop)))
+                     for obj in sources)
+
+    def _run_lazy_model(self, key):
+        r"""
+        Runs the model that produces the given key if its ``regen_mode`` is
+        'lazy', which is called when the key is requested but not found.
+        """
+        prop = '.'.join(key.split('.')[:2])
+        if (prop not in self.models.keys()) or \
+                (self.models[prop].get('regen_mode') != 'lazy'):
+            return
+        if not hasattr(self, '_lazy_active'):
+            self._lazy_active = set()
+        # Prevent infinite recursion if dependencies are circular
+        if prop in self._lazy_active:
+            return
+        self._lazy_active.add(prop)
+        try:
+            self._regen(prop, on_demand=True)
+        finally:
+            self._lazy_active.discard(prop)
+
+    def _discard_model_data(self, prop):
+        r"""
+        Removes the data produced by the given model, including the sub-keys
+        that are created when a model returns a dictionary.
+        """
+        for item in list(self.keys()):
+            if (item == prop) or item.startswith(prop+'.'):
+                self.pop(item)
+
+    def _model_inputs(self, prop):
+        r"""
+        Returns a list of the pore and throat properties passed as arguments
+        to the given model.
+        """
+        return [v for v in self.models[prop].values() if isinstance(v, str)
+                and v.split('.')[0] in ['pore', 'throat']]
+
+    def _input_versions(self, prop):
+        r"""
+        Collects the write counters of each input to the given model on all
+        objects in the Project through which the input may be looked up.
+        """
+        sources = [obj for obj in self.project if not obj._isa('algorithm')]
+        versions = {}
+        for item in self._model_inputs(prop):
+            versions[item] = tuple(obj._get_version(item) for obj in sources)
+        return versions
+
+    def _stamp_model(self, prop):
+        r"""
+        Records the state of the given model and its inputs so that
+        ``_is_dirty`` can later tell if it needs to be re-run.
+        """
+        if not hasattr(self, '_model_stamps'):
+            self._model_stamps = {}
+        self._model_stamps[prop] = {'params': self.models[prop].copy(),
+                                    'inputs': self._input_versions(prop),
+                                    'output': self._get_version(prop),
+                                    'size': (self.Np, self.Nt)}
+
+    def _is_dirty(self, prop):
+        r"""
+        Determines if the given model must be re-run because its inputs,
+        parameters, or data have changed since it was last run.
+        """
+        stamp = getattr(self, '_model_stamps', {}).get(prop, None)
+        if stamp is None:
+            return True
+        # Check if output data was removed, resized or overwritten
+        if (prop not in self.keys()) and \
+                (not any([k.startswith(prop+'.') for k in self.keys()])):
+            return True
+        if stamp['size'] != (self.Np, self.Nt):
+            return True
+        if stamp['output'] != self._get_version(prop):
+            return True
+        # Check if any parameters of the model have been changed
+        params = self.models[prop]
+        if params.keys() != stamp['params'].keys():
+            return True
+        for k, v in params.items():
+            if v is stamp['params'][k]:
+                continue
+            try:
+                if not bool(v == stamp['params'][k]):
+                    return True
+            except ValueError:  # Arrays can't be compared this way
+                return True
+        # Finally, check if any of the inputs have been written
+        return stamp['inputs'] != self._input_versions(prop)
 
     def remove_model(self, propname=None, mode=['model', 'data']):
         r"""
@@ -330,6 +671,7 @@ class ModelsMixin():
             if 'model' in mode:
                 if item in self.models.keys():
                     del self.models[item]
+                getattr(self, '_model_stamps', {}).pop(item, None)
             if 'data' in mode:
                 if item in self.keys():
                     del self[item]
@@ -39,15 +39,29 @@ class Subdomain(Base):
 
     """
 
+    def __new__(cls, *args, **kwargs):
+        instance = super().__new__(cls, *args, **kwargs)
+        # Cache of the indices where this object is located in the boss
+        instance._locations = {}
+        return instance
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        state.pop('_locations', None)
+        return state
+
     def __getitem__(self, key):
         element = key.split('.')[0]
-        # Find boss object (either phase or network)
-        boss = self.project.find_full_domain(self)
+        # Run the model now if the data comes from a lazy model
+        if key not in self.keys():
+            self._run_lazy_model(key)
         # Get values if present, or regenerate them
         vals = self.get(key)
         # If still not found, check with boss object
         if vals is None:
-            inds = boss._get_indices(element=element, labels=self.name)
+            # Find boss object (either phase or network)
+            boss = self.project.find_full_domain(self)
+            inds = self._get_locations(element=element)
             vals = boss[key][inds]
         return vals
 
@@ -118,6 +132,46 @@ class Subdomain(Base):
             self._set_locations(element='throat', indices=throats, mode='drop',
                                 complete=complete)
 
+    def _get_locations(self, element):
+        r"""
+        Returns the indices of the boss object where this object is located,
+        which are stored after the first look-up to avoid scanning the full
+        label array on every call.
+
+        Parameters
+        ----------
+        element : string
+            Either 'pore' or 'throat'
+
+        Notes
+        -----
+        The stored indices are discarded by ``add_locations``,
+        ``drop_locations`` and ``topotools.trim``, and are also recomputed if
+        the label array on the boss is overwritten.  Note that changing the
+        label array *in-place* is not detected, so it should be reassigned
+        after such changes, for instance with
+        ``pn['pore.geo_01'] = pn['pore.geo_01']``.
+
+        """
+        element = self._parse_element(element=element, single=True)
+        boss = self.project.find_full_domain(self)
+        key = element + '.' + self.name
+        stamp = (id(boss), boss._get_version(key), boss._count(element))
+        cached = self._locations.get(key)
+        if (cached is None) or (cached[0] != stamp):
+            inds = boss._get_indices(element=element, labels=self.name)
+            inds.flags.writeable = False
+            cached = (stamp, inds)
+            self._locations[key] = cached
+        return cached[1]
+
+    def _clear_locations(self):
+        r"""
+        Discards the stored location indices so they are found again on the
+        next look-up.
+        """
+        self._locations = {}
+
     def _set_locations(self, element, indices, mode, complete=False):
         r"""
         This private method is called by ``set_locations`` and
@@ -153,8 +207,11 @@ class Subdomain(Base):
         # Change size of all arrays on self
         for item in self.keys(element=element, mode='all'):
             self.update({item: boss[item][mask]})
+            self._bump_version(item)
         # Update label array in network
         boss[element+'.'+self.name] = mask
+        self._clear_locations()
+        self.project._invalidate_cache()
         # Remove label from boss if ALL locations are removed
         if mode == 'drop':
             if ~np.any(boss[element+'.'+self.name]):
@@ -129,6 +129,12 @@ class GenericNetwork(Base, ModelsMixin):
         self._im = {}
         self._am = {}
 
+    def __getstate__(self):
+        # The Laplacian pattern is easily recomputed so don't store it
+        state = super().__getstate__()
+        state.pop('_lm', None)
+        return state
+
     def __setitem__(self, key, value):
         if key == 'throat.conns':
             if sp.shape(value)[1] != 2:
@@ -152,6 +158,9 @@ class GenericNetwork(Base, ModelsMixin):
             return self[element+'.all']
         if key.split('.')[-1] == '_id':
             self._gen_ids()
+        # Run the model now if the data comes from a lazy model
+        if key not in self.keys():
+            self._run_lazy_model(key)
         # Now get values if present, or regenerate them
         vals = self.get(key)
         if vals is None:  # Invoke interleave data
@@ -251,6 +260,46 @@ class GenericNetwork(Base, ModelsMixin):
 
     im = property(fget=get_incidence_matrix)
 
+    def _get_laplacian_pattern(self):
+        r"""
+        Returns the sparsity pattern of the Laplacian matrix of the network
+        in CSR format, along with a map from each entry of the adjacency
+        matrix and each diagonal entry to its location in the CSR data array.
+
+        Returns
+        -------
+        A dictionary containing ``'indices'`` and ``'indptr'`` arrays of the
+        CSR matrix, and a ``'map'`` array of length 2*Nt + Np, which gives
+        the position of the upper triangular entries, the lower triangular
+        entries, and the diagonal entries in that order.
+
+        Notes
+        -----
+        The pattern depends only on the topology so it is computed once and
+        stored, after which a Laplacian can be assembled by scattering values
+        into the data array with ``bincount``.  It is recomputed if the
+        'throat.conns' array is overwritten.
+
+        """
+        conns = self['throat.conns']
+        stamp = (self.Np, self.Nt, id(conns), self._get_version('throat.conns'))
+        pattern = self.__dict__.setdefault('_lm', {})
+        if pattern.get('stamp') != stamp:
+            Ps = sp.arange(self.Np, dtype=sp.int64)
+            row = sp.concatenate((conns[:, 0], conns[:, 1], Ps))
+            col = sp.concatenate((conns[:, 1], conns[:, 0], Ps))
+            keys = row.astype(sp.int64)*self.Np + col
+            keys, inv = sp.unique(keys, return_inverse=True)
+            indptr = sp.zeros((self.Np + 1, ), dtype=sp.int32)
+            indptr[1:] = sp.cumsum(sp.bincount(keys // self.Np,
+                                               minlength=self.Np))
+            pattern.clear()
+            pattern.update({'stamp': stamp,
+                            'indices': (keys % self.Np).astype(sp.int32),
+                            'indptr': indptr,
+                            'map': inv})
+        return pattern
+
     am = property(fget=get_adjacency_matrix)
 
     def create_adjacency_matrix(self, weights=None, fmt='coo', triu=False,
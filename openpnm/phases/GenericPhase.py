@@ -94,6 +94,9 @@ class GenericPhase(Base, ModelsMixin):
             return net[element+'._id']
         if prop == self.name:
             return self[element+'.all']
+        # Run the model now if the data comes from a lazy model
+        if key not in self.keys():
+            self._run_lazy_model(key)
         # Now get values if present, or regenerate them
         vals = self.get(key)
         if vals is None:
@@ -50,6 +50,7 @@ class GenericPhysics(Subdomain, ModelsMixin):
         if phase is not None:
             phase['pore.'+self.name] = False
             phase['throat.'+self.name] = False
+            self.project._invalidate_cache()
         if geometry is not None:
             Ps = network.pores(geometry.name)
             Ts = network.throats(geometry.name)
@@ -23,6 +23,7 @@ from .topotools import find_connected_sites
 from .topotools import find_connecting_bonds
 from .topotools import find_pore_to_pore_distance
 from .topotools import find_clusters
+from .topotools import find_trapped_clusters
 from .topotools import find_complement
 from .topotools import generate_base_points
 from .topotools import iscoplanar
@@ -35,6 +36,7 @@ from .topotools import istriangular
 from .topotools import label_faces
 from .topotools import merge_networks
 from .topotools import merge_pores
+from .topotools import percolation_thresholds
 from .topotools import plot_connections
 from .topotools import plot_coordinates
 from .topotools import plot_networkx
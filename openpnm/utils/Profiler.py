@@ -0,0 +1,155 @@
+import json
+import time
+import threading
+import functools
+import tracemalloc
+from contextlib import contextmanager
+from openpnm.utils.misc import PrintableDict
+_lock = threading.Lock()
+
+
+class Profiler(PrintableDict):
+    r"""
+    Stores the wall time, number of calls and memory allocated by each model
+    and each stage of each algorithm in a Project.
+
+    Profiling is enabled by setting ``settings['profile']`` to ``True`` on the
+    Project, after which the Profiler is available as ``project.profiler``.
+    The records are stored by object name, then by the name of the model
+    (e.g. ``'pore.volume'``) or algorithm method (e.g. ``'_build_A'``), with
+    each record containing the following:
+
+    +----------+--------------------------------------------------------------+
+    | Key      | Description                                                  |
+    +==========+==============================================================+
+    | calls    | The number of times the model or method was run              |
+    +----------+--------------------------------------------------------------+
+    | time     | The total wall time in seconds, including any nested calls   |
+    +----------+--------------------------------------------------------------+
+    | bytes    | The total increase in memory in bytes, or ``None`` unless    |
+    |          | Python's ``tracemalloc`` module is tracing allocations       |
+    +----------+--------------------------------------------------------------+
+
+    Examples
+    --------
+    >>> import openpnm as op
+    >>> pn = op.network.Cubic(shape=[5, 5, 5])
+    >>> pn.project.settings['profile'] = True
+    >>> geo = op.geometry.StickAndBall(network=pn, pores=pn.Ps, throats=pn.Ts)
+    >>> rec = pn.project.profiler[geo.name]['pore.volume']
+    >>> rec['calls']
+    1
+
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._key = 'Object'
+        self._value = 'Records'
+        self._active = set()
+
+    def record(self, name, label, elapsed, nbytes=None):
+        r"""
+        Adds the given measurement to the record for ``label`` on the object
+        called ``name``.
+        """
+        with _lock:
+            recs = self.setdefault(name, {})
+            rec = recs.setdefault(label, {'calls': 0, 'time': 0.0,
+                                          'bytes': None})
+            rec['calls'] += 1
+            rec['time'] += elapsed
+            if nbytes is not None:
+                rec['bytes'] = (rec['bytes'] or 0) + nbytes
+
+    def report(self):
+        r"""
+        Returns a list of all records, each one a dictionary containing the
+        object name and label as well as the measurements, sorted from the
+        longest total time to the shortest.
+        """
+        recs = []
+        for name in self.keys():
+            for label, rec in self[name].items():
+                recs.append({'object': name, 'label': label, **rec})
+        return sorted(recs, key=lambda r: r['time'], reverse=True)
+
+    def to_json(self, filename=None):
+        r"""
+        Converts the records to a JSON string, which is written to the given
+        file if a filename is supplied.
+
+        Parameters
+        ----------
+        filename : string or path object, optional
+            The name of the file to write.
+
+        Returns
+        -------
+        A JSON formatted string of the records
+        """
+        s = json.dumps(dict(self), indent=2)
+        if filename is not None:
+            with open(filename, 'w') as f:
+                f.write(s)
+        return s
+
+    def __str__(self):
+        horizontal_rule = '―' * 78
+        lines = [horizontal_rule]
+        strg = '{0:<16s} {1:<32s} {2:>8s} {3:>10s} {4:>8s}'
+        lines.append(strg.format('Object', 'Label', 'Calls', 'Time (s)',
+                                 'MB'))
+        lines.append(horizontal_rule)
+        for rec in self.report():
+            mb = '' if rec['bytes'] is None else '%.2f' % (rec['bytes']/1e6)
+            lines.append(strg.format(rec['object'], rec['label'],
+                                     str(rec['calls']),
+                                     '%.4f' % rec['time'], mb))
+        lines.append(horizontal_rule)
+        return '\n'.join(lines)
+
+
+@contextmanager
+def profiling(obj, label):
+    r"""
+    Context manager which records the time and memory spent in the enclosed
+    code against the given object and label, if profiling is enabled on the
+    object's Project.  Nested calls with the same object and label (e.g. a
+    subclass calling ``super().run()``) are only counted once.
+    """
+    project = obj.project
+    if (project is None) or (not project.settings['profile']):
+        yield
+        return
+    profiler = project.profiler
+    key = (id(obj), label)
+    if key in profiler._active:
+        yield
+        return
+    profiler._active.add(key)
+    tracing = tracemalloc.is_tracing()
+    mem = tracemalloc.get_traced_memory()[0] if tracing else None
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        if tracing and tracemalloc.is_tracing():
+            mem = tracemalloc.get_traced_memory()[0] - mem
+        else:
+            mem = None
+        profiler._active.discard(key)
+        profiler.record(obj.name, label, elapsed, mem)
+
+
+def profiled(func):
+    r"""
+    Decorator which profiles each call to the decorated method, using the
+    method's name as the label.  See ``profiling`` for details.
+    """
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        with profiling(self, func.__name__):
+            return func(self, *args, **kwargs)
+    return wrapper
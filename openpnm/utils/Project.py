@@ -5,7 +5,9 @@ import numpy as np
 import openpnm
 from copy import deepcopy
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from openpnm.utils import SettingsDict, HealthDict, PrintableList, Workspace
+from openpnm.utils import Profiler
 ws = Workspace()
 
 
@@ -70,8 +72,25 @@ class Project(list):
         # Register self with workspace
         ws[name] = self
         self._grid = {}
+        self._cache = {}
         self.settings = SettingsDict()
         self.comments = 'Using OpenPNM ' + openpnm.__version__
+        for item in self:
+            item._project = self
+
+    def __getstate__(self):
+        # Lookup results are rebuilt on demand, so there's no need to store
+        state = self.__dict__.copy()
+        state.pop('_cache', None)
+        return state
+
+    def _invalidate_cache(self):
+        r"""
+        Clears the stored results of object lookups.  This must be called
+        whenever objects are added to or removed from the Project, renamed,
+        or have their locations changed.
+        """
+        self._cache = {}
 
     def extend(self, obj):
         r"""
@@ -84,12 +103,15 @@ class Project(list):
             obj = [obj]
         for item in obj:
             if hasattr(item, '_mro'):
+                self._invalidate_cache()
                 if 'GenericNetwork' in item._mro():
                     if self.network:
                         raise Exception('Project already has a network')
                 # Must use append since extend breaks the dicts up into
                 # separate objects, while append keeps it as a single object.
                 super().append(item)
+                item._project = self
+                self._invalidate_cache()
             else:
                 raise Exception('Only OpenPNM objects can be added')
 
@@ -168,7 +190,10 @@ class Project(list):
 
         """
         if len(objtype) == 0:
+            for item in self:
+                item._project = False
             super().clear()
+            self._invalidate_cache()
         else:
             names = [obj.name for obj in self]
             for name in names:
@@ -222,10 +247,7 @@ class Project(list):
 
     def __getitem__(self, key):
         if type(key) == str:
-            obj = None
-            for item in self:
-                if item.name == key:
-                    obj = item
+            obj = self._get_names_map().get(key, None)
             if obj is None:
                 raise KeyError(key)
         else:
@@ -256,9 +278,15 @@ class Project(list):
         if 'phase' in obj.settings.keys():
             phase = self.phases()[obj.settings['phase']]
             return phase
+        # Use the previous result if obj's labels are still on that phase
+        phase = self._get_cache('phase_of').get(id(obj), None)
+        if phase is not None:
+            if ('pore.'+obj.name in phase) or ('throat.'+obj.name in phase):
+                return phase
         # Otherwise find it using bottom-up approach (i.e. look in phase keys)
         for phase in self.phases().values():
             if ('pore.'+obj.name in phase) or ('throat.'+obj.name in phase):
+                self._get_cache('phase_of')[id(obj)] = phase
                 return phase
         # If all else fails, throw an exception
         raise Exception('Cannot find a phase associated with '+obj.name)
@@ -325,8 +353,21 @@ class Project(list):
         column, then each row/col intersection represents a Physics. This
         method finds the PHysics' at each intersection
 
-        """
+        The result is stored until objects are added, removed or renamed, or
+        the locations of a Geometry or Physics are changed.
 
+        """
+        key = (id(geometry) if geometry else None,
+               id(phase) if phase else None)
+        cache = self._get_cache('physics_of')
+        if key not in cache:
+            cache[key] = self._find_physics(geometry=geometry, phase=phase)
+        phys = cache[key]
+        if isinstance(phys, list):
+            phys = list(phys)
+        return phys
+
+    def _find_physics(self, geometry=None, phase=None):
         if geometry and phase:
             physics = self.find_physics(geometry=geometry)
             phases = list(self.phases().values())
@@ -350,10 +391,8 @@ class Project(list):
                 result.append(temp)
             return result
         elif phase:
-            names = set(self.physics().keys())
-            keys = set([item.split('.')[-1] for item in phase.keys()])
-            hits = names.intersection(keys)
-            phys = [self.physics().get(i, None) for i in hits]
+            phys = [item for name, item in self.physics().items()
+                    if ('pore.'+name in phase) or ('throat.'+name in phase)]
             return phys
         else:
             phys = list(self.physics().values())
@@ -401,6 +440,16 @@ class Project(list):
         name = prefix + '_' + num.zfill(2)
         return name
 
+    @property
+    def profiler(self):
+        r"""
+        The Profiler object containing the time spent in each model and
+        algorithm, which is recorded if ``settings['profile']`` is ``True``.
+        """
+        if not hasattr(self, '_profiler'):
+            self._profiler = Profiler()
+        return self._profiler
+
     @property
     def names(self):
         names = [i.name for i in self]
@@ -459,6 +508,8 @@ class Project(list):
                 if key.split('.')[-1] == obj.name:
                     del item[key]
         super().remove(obj)
+        obj._project = False
+        self._invalidate_cache()
 
     def save_object(self, obj):
         r"""
@@ -673,11 +724,15 @@ class Project(list):
 
     @property
     def network(self):
+        net = self._get_cache('misc').get('network', False)
+        if net is not False:
+            return net
         net = list(self._get_objects_by_type('network').values())
         if len(net) > 0:
             net = net[0]
         else:
             net = None
+        self._get_cache('misc')['network'] = net
         return net
 
     def geometries(self, name=None):
@@ -705,13 +760,32 @@ class Project(list):
             return self._get_objects_by_type('algorithm')
 
     def _get_object_by_name(self, name):
-        for item in self:
-            if item.name == name:
-                return item
-        raise Exception('An object named ' + name + ' was not found')
+        obj = self._get_names_map().get(name, None)
+        if obj is None:
+            raise Exception('An object named ' + name + ' was not found')
+        return obj
 
     def _get_objects_by_type(self, objtype):
-        return {item.name: item for item in self if item._isa(objtype)}
+        types = self._get_cache('types')
+        if objtype not in types:
+            types[objtype] = {item.name: item for item in self
+                              if item._isa(objtype)}
+        # Return a copy so callers can't alter the stored dict
+        return types[objtype].copy()
+
+    def _get_names_map(self):
+        names = self._get_cache('misc').get('names', None)
+        if names is None:
+            names = {}
+            for item in self:
+                names[item.name] = item
+            self._get_cache('misc')['names'] = names
+        return names
+
+    def _get_cache(self, kind):
+        if not hasattr(self, '_cache'):
+            self._cache = {}
+        return self._cache.setdefault(kind, {})
 
     def _set_comments(self, string):
         if hasattr(self, '_comments') is False:
@@ -844,6 +918,13 @@ class Project(list):
             to avoid any problems.  This means that a single model can be
             given, without specifying the objects.
 
+        Notes
+        -----
+        The Geometry objects, and likewise the Physics objects, do not depend
+        on each other so they can be regenerated concurrently.  This is done
+        on a pool of threads if ``settings['regen_threads']`` on the Workspace
+        is greater than 1.  See ``_regenerate_objects`` for details.
+
         """
         objs = list(objs)
         if objs == []:
@@ -855,8 +936,8 @@ class Project(list):
         geoms = [i for i in objs if i in self.geometries().values()]
         phases = [i for i in objs if i in self.phases().values()]
         phys = [i for i in objs if i in self.physics().values()]
-        objs = net + geoms + phases + phys
-        for obj in objs:
+
+        def regen(obj):
             if len(propnames):
                 for model in propnames:
                     if model in obj.models.keys():
@@ -864,6 +945,54 @@ class Project(list):
             else:
                 obj.regenerate_models()
 
+        # Phases may refer to each other so are not run concurrently
+        for group in [net, geoms] + [[i] for i in phases] + [phys]:
+            self._regenerate_objects(group, func=regen)
+
+    def _regenerate_objects(self, objs, propnames=None, func=None):
+        r"""
+        Regenerates the models on a group of mutually independent objects,
+        such as all the Geometries or all the Physics of a Phase, using a
+        pool of threads if requested.
+
+        Parameters
+        ----------
+        objs : list of OpenPNM objects
+            The objects whose models should be regenerated.  These must not
+            depend on each other's data.
+
+        propnames : list of strings
+            Passed on to ``regenerate_models`` of each object.  The default is
+            ``None`` which regenerates all models.
+
+        func : callable, optional
+            Called with each object in place of ``regenerate_models``.
+
+        Notes
+        -----
+        The number of threads is given by ``settings['regen_threads']`` on the
+        Workspace.  If this is ``None`` (the default) or 1, the objects are
+        regenerated one after the other.  Most models consist of Numpy calls
+        which release the GIL so threads can give a real speed-up.  Note
+        however that models drawing random numbers from a fixed ``seed`` will
+        not give reproducible values when run concurrently, since Numpy's
+        global random state is shared between the threads.
+
+        """
+        if func is None:
+            def func(obj):
+                obj.regenerate_models(propnames=propnames, deep=False)
+        threads = ws.settings['regen_threads']
+        if (threads is None) or (threads <= 1) or (len(objs) < 2):
+            for obj in objs:
+                func(obj)
+        else:
+            with ThreadPoolExecutor(max_workers=threads) as pool:
+                futures = [pool.submit(func, obj) for obj in objs]
+                # Wait for all to finish, raising any errors that occurred
+                for future in futures:
+                    future.result()
+
 
 class Grid(dict):
 
@@ -0,0 +1,241 @@
+import h5py
+import numpy as np
+
+
+class TimeSeries():
+    r"""
+    Stores snapshots of a pore or throat array at a sequence of times in a
+    single 2D array, with one row per time.
+
+    Parameters
+    ----------
+    N : int
+        The length of each snapshot, such as the number of pores
+
+    dtype : data-type
+        The type used to store the snapshots.  The default is ``float``, and
+        ``float32`` can be used to halve the memory of long runs.
+
+    filename : string, optional
+        The name of an HDF5 file to which each snapshot is appended as soon
+        as it is added.  If the file already holds a series under ``name``
+        it is reopened and further snapshots are appended to it.  The file
+        is closed when the series is pickled or copied, and reopened when it
+        is next used.
+
+    name : string
+        The name of the HDF5 group holding the series.  The default is
+        'series'.
+
+    compression : string, optional
+        The compression filter applied to the HDF5 dataset, such as 'gzip'.
+
+    in_memory : boolean
+        If ``False`` the snapshots are only kept in the HDF5 file, which must
+        then be given, so memory does not grow with the number of snapshots.
+        The default is ``True``.
+
+    overwrite : boolean
+        If ``True`` any series already stored in the file under ``name`` is
+        deleted rather than appended to.  The default is ``False``.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from openpnm.utils import TimeSeries
+    >>> ts = TimeSeries(N=3)
+    >>> ts.append(0.0, np.zeros(3))
+    >>> ts.append(0.5, np.arange(3))
+    >>> ts.at(0.5)
+    array([0., 1., 2.])
+    >>> ts.history(2)
+    array([0., 2.])
+
+    """
+
+    def __init__(self, N, dtype=float, filename=None, name='series',
+                 compression=None, in_memory=True, overwrite=False):
+        if (filename is None) and not in_memory:
+            raise Exception('A filename is required when in_memory is False')
+        self._N = int(N)
+        self._n = 0
+        self._times = np.zeros((16, ), dtype=float)
+        self._data = None
+        if in_memory:
+            self._data = np.zeros((16, self._N), dtype=dtype)
+        self._state = {}
+        self._filename = filename
+        self._name = name
+        self._file = None
+        if filename is not None:
+            f = self._open()
+            if overwrite and (name in f):
+                del f[name]
+            if name not in f:
+                group = f.create_group(name)
+                group.create_dataset('time', shape=(0, ), maxshape=(None, ),
+                                     dtype=float)
+                group.create_dataset('data', shape=(0, self._N),
+                                     maxshape=(None, self._N),
+                                     chunks=(1, self._N), dtype=dtype,
+                                     compression=compression)
+            group = f[name]
+            if group['data'].shape[1] != self._N:
+                raise Exception('The series in the file has snapshots of ' +
+                                'length ' + str(group['data'].shape[1]))
+            n = group['time'].shape[0]
+            self._grow(n)
+            self._times[:n] = group['time'][:]
+            if in_memory:
+                self._data[:n] = group['data'][:]
+            self._n = n
+
+    def __getstate__(self):
+        # Open HDF5 files cannot be pickled, so only the filename and group
+        # are kept and the file is reopened when next needed
+        state = self.__dict__.copy()
+        state['_file'] = None
+        return state
+
+    def __len__(self):
+        return self._n
+
+    def __repr__(self):
+        return 'TimeSeries of ' + str(self._n) + ' snapshots of length ' + \
+            str(self._N)
+
+    def _open(self):
+        # Open the HDF5 file, unless it is already open
+        if self._file is None:
+            self._file = h5py.File(self._filename, 'a')
+        return self._file
+
+    @property
+    def _dset(self):
+        return self._open()[self._name]['data']
+
+    @property
+    def _tset(self):
+        return self._open()[self._name]['time']
+
+    def _grow(self, n):
+        # Double the capacity until n rows fit
+        size = self._times.shape[0]
+        if n <= size:
+            return
+        while size < n:
+            size = 2*size
+        times = np.zeros((size, ), dtype=float)
+        times[:self._n] = self._times[:self._n]
+        self._times = times
+        if self._data is not None:
+            data = np.zeros((size, self._N), dtype=self._data.dtype)
+            data[:self._n] = self._data[:self._n]
+            self._data = data
+
+    def append(self, t, x):
+        r"""
+        Adds the snapshot ``x`` taken at time ``t`` to the end of the series,
+        and writes it to the HDF5 file if one was given.
+        """
+        x = np.asarray(x)
+        if x.shape != (self._N, ):
+            raise Exception('Snapshots must be of length ' + str(self._N))
+        self._grow(self._n + 1)
+        self._times[self._n] = t
+        if self._data is not None:
+            self._data[self._n] = x
+        if self._filename is not None:
+            self._tset.resize((self._n + 1, ))
+            self._dset.resize((self._n + 1, self._N))
+            self._tset[self._n] = t
+            self._dset[self._n] = x
+            self._file.flush()
+        self._n += 1
+
+    @property
+    def times(self):
+        r"""
+        The times of all snapshots, in the order they were added
+        """
+        return self._times[:self._n]
+
+    @property
+    def data(self):
+        r"""
+        An array containing one snapshot per row
+        """
+        if self._data is not None:
+            return self._data[:self._n]
+        return self._dset[:self._n]
+
+    def index(self, t, precision=12):
+        r"""
+        Returns the row of the last snapshot taken at time ``t``, comparing
+        times rounded to the given number of decimals.
+        """
+        hits = np.where(np.around(self.times, precision) ==
+                        np.around(t, precision))[0]
+        if hits.size == 0:
+            raise KeyError('No snapshot stored at time ' + str(t))
+        return hits[-1]
+
+    def at(self, t, precision=12):
+        r"""
+        Returns the snapshot taken at time ``t``
+        """
+        i = self.index(t, precision=precision)
+        if self._data is not None:
+            return self._data[i]
+        return self._dset[i]
+
+    def history(self, locs):
+        r"""
+        Returns the values at the given locations in every snapshot, as an
+        array with one row per time (or a 1D array for a single location).
+        """
+        if self._data is not None:
+            return self._data[:self._n, locs]
+        # HDF5 requires increasing indices, so read unique ones and reorder
+        locs = np.asarray(locs)
+        inds, inv = np.unique(locs, return_inverse=True)
+        vals = self._dset[:self._n, inds.tolist()]
+        return vals[:, inv.reshape(locs.shape)]
+
+    def set_state(self, **kwargs):
+        r"""
+        Stores the given arrays or scalars alongside the series, replacing
+        any stored previously, and writes them to the HDF5 file if one was
+        given.  This is used to save the state needed to restart a
+        simulation from the last snapshot.
+        """
+        self._state = {k: np.array(v, copy=True) for k, v in kwargs.items()}
+        if self._filename is not None:
+            group = self._dset.parent
+            if 'state' in group:
+                del group['state']
+            state = group.create_group('state')
+            for k, v in self._state.items():
+                state.create_dataset(k, data=v)
+            self._file.flush()
+
+    def get_state(self):
+        r"""
+        Returns a dictionary of the values last given to ``set_state``,
+        reading them from the HDF5 file if one was given.  The dictionary is
+        empty if no state has been stored.
+        """
+        if self._filename is not None:
+            group = self._dset.parent
+            if 'state' in group:
+                return {k: v[()] for k, v in group['state'].items()}
+        return dict(self._state)
+
+    def close(self):
+        r"""
+        Closes the HDF5 file, if any.  It is reopened if the series is
+        appended to or queried from the file again.
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -80,6 +80,8 @@ class Workspace(dict):
             self.pop(project.name, None)
         if not isinstance(project, openpnm.utils.Project):
             project = openpnm.utils.Project(project, name=name)
+        for item in project:
+            item._project = project
         super().__setitem__(name, project)
 
     def copy(self):
@@ -268,6 +270,8 @@ class Workspace(dict):
 
         This does not save the project, so any changes will be lost.
         """
+        for item in project:
+            item._project = False
         del self[project.name]
 
     def copy_project(self, project, name=None):
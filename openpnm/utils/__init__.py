@@ -19,6 +19,8 @@ from .misc import flat_list
 from .misc import sanitize_dict
 from .misc import unique_list
 from .misc import tic, toc
+from .Profiler import Profiler, profiling, profiled
+from .TimeSeries import TimeSeries
 from .Workspace import Workspace
 from .Project import Project
 
@@ -24,7 +24,7 @@ class PETScSparseLinearSolver(Base):
     $ mpirun -np 4 python3.5 script.py
     for parallel computing.
     """
-    def __init__(self, A, b, settings={}):
+    def __init__(self, A, b, x0=None, settings={}):
         r"""
         Initialize the sparse system of linear equations.
 
@@ -34,6 +34,8 @@ class PETScSparseLinearSolver(Base):
             2D Coefficient matrix
         rhs : dense matrix
             1D RHS vector
+        x0 : dense matrix, optional
+            1D initial guess used by iterative solvers
         """
         # Set some default settings
         def_set = {'type': 'cg',
@@ -45,6 +47,7 @@ class PETScSparseLinearSolver(Base):
         self.settings.update(settings)
         self.A = A
         self.b = b
+        self.x0 = x0
 
     def _initialize_A(self):
         r"""
@@ -175,8 +178,17 @@ class PETScSparseLinearSolver(Base):
         # i.e., with the same parallel layout.
         self.petsc_x, self.petsc_b = self.petsc_A.getVecs()
 
-        #  Set the solution vector to zeros.
-        self.petsc_x.set(0)
+        #  Set the solution vector to the initial guess, or to zeros.
+        if self.x0 is None:
+            self.petsc_x.set(0)
+        else:
+            PETSc.Vec.setValuesBlocked(self.petsc_x, [sp.arange(self.m)],
+                                       self.x0)
+            self.petsc_x.assemblyBegin()
+            self.petsc_x.assemblyEnd()
+            # Direct solvers (preonly) do not accept a nonzero guess
+            if self.ksp.getType() != 'preonly':
+                self.ksp.setInitialGuessNonzero(True)
 
         # Define the petsc rhs vector from the numpy one.
         # If the rhs is defined by blocks, use this:
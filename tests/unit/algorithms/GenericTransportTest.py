@@ -80,6 +80,241 @@ class GenericTransportTest:
         y = sp.unique(sp.around(alg['pore.mole_fraction'], decimals=3))
         assert sp.all(x == y)
 
+    def test_build_A_reuses_sparsity_pattern(self):
+        import scipy.sparse.csgraph as spgr
+        net = op.network.Cubic(shape=[4, 4, 4])
+        phase = op.phases.GenericPhase(network=net)
+        phase['throat.diffusive_conductance'] = sp.rand(net.Nt)
+        alg = op.algorithms.FickianDiffusion(network=net, phase=phase)
+        alg._build_A()
+        g = phase['throat.diffusive_conductance']
+        am = net.create_adjacency_matrix(weights=g, fmt='coo')
+        assert abs(alg.A - spgr.laplacian(am)).max() < 1e-12
+        # Rebuilding overwrites the values of the existing matrix
+        A = alg._pure_A
+        data = A.data
+        phase['throat.diffusive_conductance'] = 2*g
+        alg._build_A(force=True)
+        assert alg._pure_A is A
+        assert alg._pure_A.data is data
+        assert sp.allclose(alg.A.toarray(), 2*spgr.laplacian(am).toarray())
+        # Asymmetric conductances are accepted as well
+        g2 = sp.rand(net.Nt, 2)
+        am = net.create_adjacency_matrix(weights=g2, fmt='coo')
+        A = alg._assemble_laplacian(net, g2)
+        assert abs(A - spgr.laplacian(am)).max() < 1e-12
+        # Changing the topology produces a new pattern
+        A = alg._pure_A
+        op.topotools.trim(network=net, pores=[0])
+        phase['throat.diffusive_conductance'] = sp.ones(net.Nt)
+        alg._build_A(force=True)
+        assert alg._pure_A is not A
+        assert alg.A.shape == (net.Np, net.Np)
+        assert sp.allclose(alg.A.sum(axis=0), 0)
+
+    def test_apply_BCs_reuses_masks(self):
+        net = op.network.Cubic(shape=[4, 4, 4])
+        phase = op.phases.GenericPhase(network=net)
+        phase['throat.diffusive_conductance'] = sp.rand(net.Nt)
+        alg = op.algorithms.FickianDiffusion(network=net, phase=phase)
+        alg.set_value_BC(pores=net.pores('left'), values=1)
+        alg.set_value_BC(pores=net.pores('right'), values=0)
+        alg._build_A()
+        alg._build_b()
+        # Reference matrix with BC rows and columns replaced by hand
+        A = alg.A.toarray()
+        f = sp.absolute(alg.A.data).mean()
+        ind = sp.isfinite(alg['pore.bc_value'])
+        A[ind, :] = 0
+        A[:, ind] = 0
+        A[ind, ind] = f
+        alg._apply_BCs()
+        assert sp.sparse.isspmatrix_csr(alg.A)
+        assert sp.allclose(alg.A.toarray(), A)
+        masks = alg._BC_masks
+        # Applying the same BCs to a rebuilt matrix reuses the masks
+        alg._build_A(force=True)
+        alg._build_b(force=True)
+        alg._apply_BCs()
+        assert alg._BC_masks is masks
+        assert alg.A is masks['A']
+        assert sp.allclose(alg.A.toarray(), A)
+        # Changing the BC locations recomputes them
+        alg.remove_BC(pores=net.pores('right'))
+        alg._build_A()
+        alg._build_b()
+        alg._apply_BCs()
+        assert alg._BC_masks is not masks
+        assert alg.A.nnz > masks['A'].nnz
+
+    def test_solver_reused_for_unchanged_A(self):
+        alg = op.algorithms.GenericTransport(network=self.net,
+                                             phase=self.phase)
+        alg.settings['conductance'] = 'throat.diffusive_conductance'
+        alg.settings['quantity'] = 'pore.mole_fraction'
+        alg.set_value_BC(pores=self.net.pores('top'), values=1)
+        alg.set_value_BC(pores=self.net.pores('bottom'), values=0)
+        alg.run()
+        x = alg['pore.mole_fraction'].copy()
+        solver = alg._solver_cache['solver']
+        alg._build_b(force=True)
+        alg._build_A(force=True)
+        alg.run()
+        assert alg._solver_cache['solver'] is solver
+        assert sp.allclose(alg['pore.mole_fraction'], x)
+        # A new matrix is factorized again
+        alg.set_value_BC(pores=self.net.pores('top'), values=2)
+        alg.remove_BC(pores=self.net.pores('bottom'))
+        alg.set_value_BC(pores=self.net.pores('left'), values=0)
+        alg._build_b(force=True)
+        alg._build_A(force=True)
+        alg.run()
+        assert alg._solver_cache['solver'] is not solver
+        # Caching can be turned off
+        alg.settings['cache_solver'] = False
+        alg._build_b(force=True)
+        alg._build_A(force=True)
+        alg.run()
+        assert alg._solver_cache is None
+        # A stale cache is not reused once caching is turned off
+        alg.settings['cache_solver'] = True
+        alg.run()
+        solver = alg._solver_cache['solver']
+        alg.settings['cache_solver'] = False
+        assert alg._get_solver(alg.A) is not solver
+        assert alg._solver_cache is None
+
+    def test_copy_and_save_with_cached_solver(self, tmpdir):
+        ws = op.Workspace()
+        net = op.network.Cubic(shape=[4, 4, 4])
+        phase = op.phases.GenericPhase(network=net)
+        phase['throat.diffusive_conductance'] = 1.0
+        alg = op.algorithms.GenericTransport(network=net, phase=phase)
+        alg.settings['conductance'] = 'throat.diffusive_conductance'
+        alg.settings['quantity'] = 'pore.mole_fraction'
+        alg.set_value_BC(pores=net.pores('top'), values=1)
+        alg.set_value_BC(pores=net.pores('bottom'), values=0)
+        alg.run()
+        assert alg._solver_cache is not None
+        proj = ws.copy_project(net.project)
+        alg2 = proj.algorithms()[alg.name]
+        assert alg2._solver_cache is None
+        assert sp.all(alg2['pore.mole_fraction'] == alg['pore.mole_fraction'])
+        fname = str(tmpdir.join('transport.pnm'))
+        name = net.project.name
+        ws.save_project(net.project, filename=fname)
+        ws.close_project(net.project)
+        ws.load_project(filename=fname)
+        alg3 = ws[name].algorithms()[alg.name]
+        alg3.run()
+        assert sp.allclose(alg3['pore.mole_fraction'],
+                           alg['pore.mole_fraction'])
+
+    def test_warm_start(self):
+        alg = op.algorithms.GenericTransport(network=self.net,
+                                             phase=self.phase)
+        alg.settings['conductance'] = 'throat.diffusive_conductance'
+        alg.settings['quantity'] = 'pore.mole_fraction'
+        alg.settings['solver_type'] = 'cg'
+        alg.settings['warm_start'] = True
+        alg.set_value_BC(pores=self.net.pores('top'), values=1)
+        alg.set_value_BC(pores=self.net.pores('bottom'), values=0)
+        assert alg._get_x0(b=sp.zeros(self.net.Np)) is None
+        alg.run()
+        x = alg['pore.mole_fraction'].copy()
+        assert sp.allclose(alg._get_x0(b=sp.zeros(self.net.Np)), x)
+        assert alg._get_x0(b=sp.zeros(self.net.Np + 1)) is None
+        # Starting from the solution returns it unchanged
+        alg._build_A(force=True)
+        alg._build_b(force=True)
+        alg.run()
+        assert sp.allclose(alg['pore.mole_fraction'], x)
+        alg.settings['warm_start'] = False
+        alg._build_A(force=True)
+        alg._build_b(force=True)
+        alg.run()
+        assert sp.allclose(alg['pore.mole_fraction'], x, atol=1e-5)
+
+    def test_matrix_free(self):
+        from openpnm.algorithms.GenericTransport import LaplacianOperator
+        net = op.network.Cubic(shape=[5, 5, 5])
+        phase = op.phases.GenericPhase(network=net)
+        phase['throat.diffusive_conductance'] = sp.rand(net.Nt)
+        alg = op.algorithms.FickianDiffusion(network=net, phase=phase)
+        alg.settings['solver_type'] = 'cg'
+        alg.set_value_BC(pores=net.pores('left'), values=1)
+        alg.set_value_BC(pores=net.pores('right'), values=0)
+        alg.run()
+        x = alg['pore.concentration'].copy()
+        # The operator matches the assembled matrix
+        alg._build_A(force=True)
+        A = alg.A.toarray()
+        alg.settings['matrix_free'] = True
+        alg._build_A()
+        assert isinstance(alg.A, LaplacianOperator)
+        v = sp.rand(net.Np)
+        assert sp.allclose(alg.A*v, A.dot(v))
+        assert sp.allclose(alg.A.rmatvec(v), A.T.dot(v))
+        # And gives the same solution
+        alg._build_b(force=True)
+        alg['pore.concentration'] = 0.0
+        alg.run()
+        assert sp.allclose(alg['pore.concentration'], x, atol=1e-5)
+        alg.settings['solver_type'] = 'spsolve'
+        alg._build_A(force=True)
+        alg._build_b(force=True)
+        with pytest.raises(Exception):
+            alg.run()
+
+    def test_solve_with_zero_A(self):
+        net = op.network.Cubic(shape=[3, 3, 3])
+        phase = op.phases.GenericPhase(network=net)
+        phase['throat.diffusive_conductance'] = 0.0
+        alg = op.algorithms.FickianDiffusion(network=net, phase=phase)
+        alg.settings['solver_type'] = 'cg'
+        alg._build_A()
+        assert not sp.any(alg.A.data)
+        x = alg._solve(A=alg.A, b=sp.zeros(net.Np))
+        assert sp.all(x == 0)
+        alg.settings['matrix_free'] = True
+        alg._build_A(force=True)
+        assert alg.A.min_abs() == 0
+        x = alg._solve(A=alg.A, b=sp.zeros(net.Np))
+        assert sp.all(x == 0)
+
+    def test_run_batch(self):
+        alg = op.algorithms.GenericTransport(network=self.net,
+                                             phase=self.phase)
+        alg.settings['conductance'] = 'throat.diffusive_conductance'
+        alg.settings['quantity'] = 'pore.mole_fraction'
+        alg.set_value_BC(pores=self.net.pores('top'), values=1)
+        values = sp.full((self.net.Np, 3), sp.nan)
+        rates = sp.full((self.net.Np, 3), sp.nan)
+        values[self.net.pores('top'), 0] = 1
+        values[self.net.pores('bottom'), 0] = 0
+        values[self.net.pores('top'), 1] = 2
+        values[self.net.pores('bottom'), 1] = 0
+        values[self.net.pores('top'), 2] = 0
+        rates[self.net.pores('bottom'), 2] = 1
+        x = alg.run_batch(values=values, rates=rates)
+        assert x.shape == (self.net.Np, 3)
+        assert sp.allclose(x[:, 1], 2*x[:, 0])
+        y = [0., 1., 2., 3., 4., 5., 6., 7., 8.]
+        assert sp.all(sp.unique(sp.around(x[:, 2], decimals=3)) == y)
+        # The BCs on the algorithm itself are left untouched
+        assert sp.sum(sp.isfinite(alg['pore.bc_value'])) == 81
+        assert sp.sum(sp.isfinite(alg['pore.bc_rate'])) == 0
+        with pytest.raises(Exception):
+            alg.run_batch(values=values, rates=rates[:, :2])
+        # A k-by-Np array is not transposed to fit
+        with pytest.raises(Exception):
+            alg.run_batch(values=values.T)
+        # The iterative solvers give the same results column by column
+        alg.settings['solver_type'] = 'cg'
+        alg.settings['solver_rtol'] = 1e-12
+        y = alg.run_batch(values=values, rates=rates)
+        assert sp.allclose(x, y)
+
     def teardown_class(self):
         ws = op.Workspace()
         ws.clear()
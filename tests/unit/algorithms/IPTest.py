@@ -40,6 +40,61 @@ class IPTest:
         alg.run()
         assert alg['throat.invasion_sequence'].max() == (alg.Nt-1)
 
+    def test_run_in_steps(self):
+        alg = op.algorithms.InvasionPercolation(network=self.net)
+        alg.setup(phase=self.water)
+        alg.set_inlets(pores=self.net.pores('top'))
+        alg.run(n_steps=50)
+        # Each throat is only queued once
+        assert len(alg.queue) == len(set(alg.queue))
+        assert alg['throat.invasion_sequence'].max() == 49
+        alg.run()
+        seq = alg['throat.invasion_sequence']
+        assert sp.all(sp.sort(seq) == sp.arange(alg.Nt))
+        # Each throat is invaded after its pores are reached
+        Pseq = alg['pore.invasion_sequence'][self.net['throat.conns']]
+        assert sp.all(sp.amin(Pseq, axis=1) <= seq)
+
+    def test_run_after_changing_conns(self):
+        net = op.network.Cubic(shape=[6, 6, 1])
+        phase = op.phases.GenericPhase(network=net)
+        phase['throat.entry_pressure'] = sp.rand(net.Nt)
+        alg = op.algorithms.InvasionPercolation(network=net)
+        alg.setup(phase=phase, entry_pressure='throat.entry_pressure')
+        # Rewire the throats after the neighbor index was built in setup
+        net['throat.conns'] = net['throat.conns'][sp.random.permutation(
+            net.Nt)]
+        alg.set_inlets(pores=net.pores('left'))
+        alg.run()
+        ref = op.algorithms.InvasionPercolation(network=net)
+        ref.setup(phase=phase, entry_pressure='throat.entry_pressure')
+        ref.set_inlets(pores=net.pores('left'))
+        ref.run()
+        assert sp.all(alg['pore.invasion_sequence'] ==
+                      ref['pore.invasion_sequence'])
+        assert sp.all(alg['throat.invasion_sequence'] ==
+                      ref['throat.invasion_sequence'])
+
+    def test_run_batch(self):
+        alg = op.algorithms.InvasionPercolation(network=self.net)
+        alg.setup(phase=self.water)
+        inlets = [self.net.pores('top'), self.net.pores('left'), [0, 500]]
+        batch = alg.run_batch(inlets=inlets, processes=1)
+        assert batch['pore.invasion_sequence'].shape == (alg.Np, 3)
+        assert batch['throat.invasion_sequence'].shape == (alg.Nt, 3)
+        for i, Ps in enumerate(inlets):
+            alg.setup(phase=self.water)
+            alg.set_inlets(pores=Ps)
+            alg.run()
+            assert sp.all(batch['pore.invasion_sequence'][:, i] ==
+                          alg['pore.invasion_sequence'])
+            assert sp.all(batch['throat.invasion_sequence'][:, i] ==
+                          alg['throat.invasion_sequence'])
+        # The same results are found on a pool of processes
+        pool = alg.run_batch(inlets=inlets, processes=2)
+        assert sp.all(pool['pore.invasion_sequence'] ==
+                      batch['pore.invasion_sequence'])
+
     def test_results(self):
         alg = op.algorithms.InvasionPercolation(network=self.net)
         alg.setup(phase=self.water)
@@ -57,6 +112,28 @@ class IPTest:
         assert S < 0.6
         assert S > 0.4
 
+    def test_results_vectorized(self):
+        alg = op.algorithms.InvasionPercolation(network=self.net)
+        alg.setup(phase=self.water)
+        alg.set_inlets(pores=self.net.pores('top'))
+        alg.run()
+        Snwp = sp.linspace(0, 1, 11)
+        d = alg.results(Snwp=Snwp)
+        assert d['pore.occupancy'].shape == (alg.Np, 11)
+        assert d['throat.occupancy'].shape == (alg.Nt, 11)
+        for i, S in enumerate(Snwp):
+            r = alg.results(Snwp=S)
+            assert sp.all(d['pore.occupancy'][:, i] == r['pore.occupancy'])
+            assert sp.all(d['throat.occupancy'][:, i] == r['throat.occupancy'])
+        assert not sp.any(d['pore.occupancy'][:, 0])
+        # The saturation table follows changes to the pore volumes
+        S0 = alg._get_saturation_table()
+        Vp = self.geo['pore.volume']
+        self.geo['pore.volume'] = Vp*2
+        assert not sp.allclose(alg._get_saturation_table(), S0)
+        self.geo['pore.volume'] = Vp
+        assert sp.allclose(alg._get_saturation_table(), S0)
+
     def test_trapping(self):
         alg = op.algorithms.InvasionPercolation(network=self.net)
         alg.setup(phase=self.water)
@@ -116,6 +116,50 @@ class OrdinaryPercolationTest:
         self.alg.set_inlets(pores=Ps)
         self.alg.run(points=range(0, 20000, 1000))
 
+    def test_run_exact_pressures(self):
+        self.alg = op.algorithms.OrdinaryPercolation(network=self.net)
+        self.alg.setup(phase=self.water)
+        self.alg.set_inlets(pores=self.net.pores('top'))
+        self.alg.run(points=None)
+        Pinv = self.alg['throat.invasion_pressure']
+        Tentry = self.alg['throat.entry_pressure']
+        # Throats are invaded at or above their own entry pressure
+        assert sp.all(Pinv[Pinv < sp.inf] >= Tentry[Pinv < sp.inf])
+        assert sp.sum(Pinv == Tentry) > 0
+        # Applying points gives the first point above the exact pressure
+        points = sp.linspace(0, Tentry.max()*1.05, 20)
+        alg2 = op.algorithms.OrdinaryPercolation(network=self.net)
+        alg2.setup(phase=self.water)
+        alg2.set_inlets(pores=self.net.pores('top'))
+        alg2.run(points=points)
+        Pinv2 = alg2['pore.invasion_pressure']
+        Pinv = self.alg['pore.invasion_pressure']
+        assert sp.all(Pinv2 >= Pinv)
+        inds = sp.searchsorted(points, Pinv)
+        assert sp.all(Pinv2 == points[inds])
+
+    def test_run_matches_bond_percolation(self):
+        self.alg = op.algorithms.OrdinaryPercolation(network=self.net)
+        self.alg.setup(phase=self.water)
+        Pin = self.net.pores('top')
+        self.alg.set_inlets(pores=Pin)
+        self.alg.run(points=25)
+        # Repeat the percolation at each of the same points
+        Tentry = self.alg['throat.entry_pressure']
+        points = sp.logspace(sp.log10(max(1, Tentry.min()*0.95)),
+                             sp.log10(Tentry.max()*1.05), 25)
+        Pinv = sp.ones(self.net.Np)*sp.inf
+        Tinv = sp.ones(self.net.Nt)*sp.inf
+        Pinv[Pin] = 0
+        for p in points:
+            labels = op.topotools.bond_percolation(self.net['throat.conns'],
+                                                   Tentry <= p)
+            labels = op.topotools.remove_isolated_clusters(labels, inlets=Pin)
+            Pinv[(Pinv == sp.inf)*(labels.sites >= 0)] = p
+            Tinv[(Tinv == sp.inf)*(labels.bonds >= 0)] = p
+        assert sp.all(self.alg['pore.invasion_pressure'] == Pinv)
+        assert sp.all(self.alg['throat.invasion_pressure'] == Tinv)
+
     def test_run_no_inlets(self):
         self.alg = op.algorithms.OrdinaryPercolation(network=self.net)
         self.alg.setup(phase=self.water)
@@ -132,6 +176,34 @@ class OrdinaryPercolationTest:
         assert sum(data['pore.occupancy']) > 0
         assert sum(data['throat.occupancy']) > 0
 
+    def test_get_intrusion_data(self):
+        self.alg = op.algorithms.OrdinaryPercolation(network=self.net)
+        self.alg.setup(phase=self.water, pore_volume='pore.volume',
+                       throat_volume='throat.volume')
+        self.alg.set_inlets(pores=self.net.pores('top'))
+        self.alg.run(points=None)
+        data = self.alg.get_intrusion_data()
+        assert sp.all(sp.diff(data.Snwp) >= 0)
+        assert sp.allclose(data.Snwp[-1], 1.0)
+        # Compare with the occupancy found at each pressure
+        Pc = data.Pcap[::10]
+        occ = self.alg.results(Pc=Pc)
+        assert occ['pore.occupancy'].shape == (self.net.Np, len(Pc))
+        Vp = self.net['pore.volume']
+        Vt = self.net['throat.volume']
+        V = (sp.sum(Vp[:, sp.newaxis]*occ['pore.occupancy'], axis=0) +
+             sp.sum(Vt[:, sp.newaxis]*occ['throat.occupancy'], axis=0))
+        S = V/(Vp.sum() + Vt.sum())
+        assert sp.allclose(S, data.Snwp[::10])
+        assert sp.allclose(self.alg.get_intrusion_data(Pc=Pc).Snwp, S)
+        # The volume table follows changes to the throat volumes
+        Vt = self.geo['throat.volume']
+        self.geo['throat.volume'] = 0.0
+        S = self.alg.get_intrusion_data(Pc=Pc).Snwp
+        assert sp.allclose(S, sp.sum(Vp[:, sp.newaxis] *
+                                     occ['pore.occupancy'], axis=0)/Vp.sum())
+        self.geo['throat.volume'] = Vt
+
     def test_is_percolating(self):
         self.alg = op.algorithms.OrdinaryPercolation(network=self.net)
         self.alg.setup(phase=self.water,
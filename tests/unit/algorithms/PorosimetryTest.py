@@ -61,6 +61,16 @@ class PorosimetryTest:
         mip.run()
         data_w_ltf = mip.get_intrusion_data()
         assert sp.any(sp.array(data_w_ltf.Snwp) < sp.array(data_w_lpf.Snwp))
+        # An array of pressures gives one column per pressure
+        Pc = data_w_ltf.Pcap[::20]
+        occ = mip.results(Pc=Pc)
+        assert occ['throat.occupancy'].shape == (self.net.Nt, len(Pc))
+        for i, p in enumerate(Pc):
+            r = mip.results(Pc=p)
+            assert sp.allclose(occ['pore.occupancy'][:, i],
+                               r['pore.occupancy'])
+            assert sp.allclose(occ['throat.occupancy'][:, i],
+                               r['throat.occupancy'])
 
 
 if __name__ == '__main__':
@@ -40,6 +40,48 @@ class GenericTransportTest:
         y = sp.unique(sp.around(rt['pore.concentration'], decimals=4))
         assert sp.all(x == y)
 
+    def test_newton(self):
+        rt = op.algorithms.ReactiveTransport(network=self.net,
+                                             phase=self.phase)
+        rt.setup(r_tolerance=0.001, max_iter=5000,
+                 nonlinear_solver='newton')
+        rt.settings.update({'conductance': 'throat.diffusive_conductance',
+                            'quantity': 'pore.concentration'})
+        rt.set_source(pores=self.net.pores('bottom'), propname='pore.reaction')
+        rt.set_value_BC(pores=self.net.pores('top'), values=1.0)
+        rt.run()
+        x = [0.0011, 0.1260, 0.2508, 0.3757,
+             0.5006, 0.6254, 0.7503, 0.8751, 1.0]
+        y = sp.unique(sp.around(rt['pore.concentration'], decimals=4))
+        assert sp.all(x == y)
+        assert rt.convergence['converged']
+        n = rt.convergence['iterations']
+        assert len(rt.convergence['residuals']) == n
+        # Picard needs at least as many iterations
+        rt.settings['nonlinear_solver'] = 'picard'
+        rt.run()
+        assert rt.convergence['iterations'] >= n
+
+    def test_newton_stalled(self):
+        rt = op.algorithms.ReactiveTransport(network=self.net,
+                                             phase=self.phase)
+        rt.setup(r_tolerance=0.001, max_iter=5000,
+                 nonlinear_solver='newton')
+        rt.settings.update({'conductance': 'throat.diffusive_conductance',
+                            'quantity': 'pore.concentration'})
+        rt.set_source(pores=self.net.pores('bottom'), propname='pore.reaction')
+        rt.set_value_BC(pores=self.net.pores('top'), values=1.0)
+        # Steps in the wrong direction never decrease the residual
+        rt._solve = lambda A, b, x0: -op.algorithms.GenericTransport._solve(
+            rt, A=A, b=b, x0=x0)
+        x0 = sp.ones(self.net.Np)*0.5
+        rt.run(x=x0.copy())
+        assert not rt.convergence['converged']
+        assert rt.convergence['residuals'] == []
+        assert sp.all(rt['pore.concentration'] == x0)
+        # The source terms are left evaluated at the returned solution
+        assert sp.allclose(self.phys['pore.reaction.rate'], -1e-10*0.5**2)
+
     def test_source_over_BCs(self):
         rt = op.algorithms.ReactiveTransport(network=self.net,
                                              phase=self.phase)
@@ -79,6 +79,134 @@ class TransientImplicitReactiveTransportTest:
         y = sp.around(alg[alg.settings['quantity']], decimals=5)
         assert sp.all(x == y)
 
+    def test_transient_results_stored_in_time_series(self):
+        net = op.network.Cubic(shape=[3, 3, 1])
+        net['pore.volume'] = 100.0
+        phase = op.phases.GenericPhase(network=net)
+        phase['throat.diffusive_conductance'] = 1.0
+        alg = op.algorithms.TransientReactiveTransport(network=net,
+                                                       phase=phase,
+                                                       settings=self.settings)
+        alg.settings.update({'t_scheme': 'implicit', 't_step': 1,
+                             't_final': 10, 't_output': 2,
+                             't_tolerance': 1e-12})
+        alg.set_IC(0)
+        alg.set_value_BC(pores=net.pores('left'), values=2)
+        alg.run()
+        assert not any('@' in k for k in alg.keys())
+        ts = alg.time_series
+        assert sp.allclose(ts.times, [0, 2, 4, 6, 8, 10])
+        assert sp.all(ts.at(10) == alg['pore.concentration'])
+        assert ts.history(net.pores('left')).shape == (6, 3)
+        r = alg.results(times=4)
+        assert list(r.keys()) == ['pore.concentration@4']
+        assert sp.all(r['pore.concentration@4'] == ts.at(4))
+        assert len(alg.results(times='range(2, 6, 2)')) == 3
+
+    def test_transient_resume_from_checkpoint(self, tmpdir):
+        net = op.network.Cubic(shape=[3, 3, 1])
+        net['pore.volume'] = 100.0
+        phase = op.phases.GenericPhase(network=net)
+        phase['throat.diffusive_conductance'] = 1.0
+        fname = str(tmpdir.join('run.hdf5'))
+        sets = {'t_scheme': 'implicit', 't_step': 1, 't_output': 2,
+                't_tolerance': 1e-12, 't_output_file': fname,
+                't_output_in_memory': False}
+        sets.update(self.settings)
+        # A full run for reference
+        ref = op.algorithms.TransientReactiveTransport(network=net,
+                                                       phase=phase,
+                                                       settings=sets)
+        ref.settings.update({'t_output_file': None,
+                             't_output_in_memory': True, 't_final': 10})
+        ref.set_IC(0)
+        ref.set_value_BC(pores=net.pores('left'), values=2)
+        ref.run()
+        # A run interrupted at t=4, then resumed by a new algorithm
+        alg = op.algorithms.TransientReactiveTransport(network=net,
+                                                       phase=phase,
+                                                       settings=sets)
+        alg.settings['t_final'] = 4
+        alg.set_IC(0)
+        alg.set_value_BC(pores=net.pores('left'), values=2)
+        alg.run()
+        alg.time_series.close()
+        alg = op.algorithms.TransientReactiveTransport(network=net,
+                                                       phase=phase,
+                                                       settings=sets)
+        alg.settings['t_final'] = 10
+        alg.set_value_BC(pores=net.pores('left'), values=2)
+        alg.run(resume=True)
+        assert sp.allclose(alg.time_series.times, [0, 2, 4, 6, 8, 10])
+        assert sp.allclose(alg.time_series.data, ref.time_series.data)
+        assert alg.time_series.get_state()['t'] == 10
+        alg.time_series.close()
+        with pytest.raises(Exception):
+            ref.run(resume=True)
+
+    def test_transient_checkpoint_interval(self, tmpdir):
+        ws = op.Workspace()
+        net = op.network.Cubic(shape=[3, 3, 1])
+        net['pore.volume'] = 100.0
+        phase = op.phases.GenericPhase(network=net)
+        phase['throat.diffusive_conductance'] = 1.0
+        fname = str(tmpdir.join('run.hdf5'))
+        sets = {'t_scheme': 'implicit', 't_step': 1, 't_output': 5,
+                't_final': 10, 't_tolerance': 1e-12, 't_output_file': fname,
+                't_checkpoint': 1}
+        sets.update(self.settings)
+        # A run that crashes at t=4, between the outputs at 0 and 5
+        alg = op.algorithms.TransientReactiveTransport(network=net,
+                                                       phase=phase,
+                                                       settings=sets)
+        alg.set_IC(0)
+        alg.set_value_BC(pores=net.pores('left'), values=2)
+        steps = []
+
+        def crash(x):
+            if len(steps) == 3:
+                raise Exception('Simulated crash')
+            steps.append(x)
+            return op.algorithms.TransientReactiveTransport._t_run_reactive(
+                alg, x)
+        alg._t_run_reactive = crash
+        with pytest.raises(Exception):
+            alg.run()
+        del alg._t_run_reactive
+        assert sp.allclose(alg.time_series.times, [0])
+        assert alg.time_series.get_state()['t'] == 3
+        alg.run(resume=True)
+        assert sp.allclose(alg.time_series.times, [0, 5, 10])
+        # A project holding the checkpointed algorithm can be copied and saved
+        proj = ws.copy_project(net.project)
+        alg2 = list(proj.algorithms().values())[0]
+        assert sp.allclose(alg2.time_series.at(5), alg.time_series.at(5))
+        assert alg2.time_series.get_state()['t'] == 10
+        ws.save_project(net.project, filename=str(tmpdir.join('proj')))
+        alg.time_series.close()
+        alg2.time_series.close()
+
+    def test_transient_adaptive_reactive_transport(self):
+        alg = op.algorithms.TransientReactiveTransport(network=self.net,
+                                                       phase=self.phase,
+                                                       settings=self.settings)
+        alg.settings.update({'t_scheme': 'implicit', 't_step': 0.1,
+                             't_final': 1000, 't_output': [0.5, 20],
+                             't_tolerance': 1e-07, 'r_tolerance': 1e-06,
+                             't_adaptive': True, 't_adaptive_tol': 1e-03})
+        alg.set_IC(0)
+        alg.set_value_BC(pores=self.net.pores('left'), values=2)
+        alg.set_source(propname='pore.reaction', pores=self.net.pores('right'))
+        alg.run()
+        x = [2., 1.00158, 0.00316,
+             2., 1.00158, 0.00316,
+             2., 1.00158, 0.00316]
+        y = sp.around(alg[alg.settings['quantity']], decimals=5)
+        assert sp.all(x == y)
+        # Output times are hit exactly
+        assert 'pore.concentration@5e-1' in alg.results().keys()
+        assert 'pore.concentration@20' in alg.results().keys()
+
     def test_adding_bc_over_sources(self):
         alg = op.algorithms.TransientReactiveTransport(network=self.net,
                                                        phase=self.phase,
@@ -111,6 +111,31 @@ class BaseTest:
         b = self.net.pores(labels=['top', 'front'], mode='or')
         assert sp.all(sp.where(a)[0] == b)
 
+    def test_pores_with_cached_label_queries(self):
+        net = op.network.Cubic(shape=[5, 5, 5])
+        labels = ['top', 'front', 'left']
+        modes = ['or', 'and', 'xor', 'nor', 'nand', 'xnor']
+        expected = [net.pores(labels=labels, mode=m) for m in modes]
+        front = net.pores('front')
+        net.settings['cache_label_queries'] = True
+        for m, b in zip(modes, expected):
+            a = net.pores(labels=labels, mode=m)
+            assert sp.all(a == b)
+            # Repeat to hit the stored result
+            a = net.pores(labels=labels, mode=m)
+            assert sp.all(a == b)
+        assert net.pores(labels=[], mode='and').size == net.Np
+        # Writing to a label is detected
+        net['pore.top'] = False
+        assert net.pores('top').size == 0
+        assert sp.all(net.pores(['top', 'front'], mode='xor') == front)
+        # Modifying the returned indices doesn't affect the stored result
+        a = net.pores('front')
+        a[:] = 0
+        assert sp.all(net.pores('front') == front)
+        with pytest.raises(Exception):
+            net.pores(labels=labels, mode='bob')
+
     def test_throats(self):
         a = self.net.throats()
         assert sp.all(a == sp.arange(0, self.net.Nt))
@@ -762,6 +787,36 @@ class BaseTest:
         geom['pore.blah'] = True
         assert sp.sum(net['pore.blah']) == geom.Np
 
+    def test_interleave_data_with_views(self):
+        net = op.network.Cubic(shape=[2, 2, 2])
+        net.settings['interleave_views'] = True
+        geo1 = op.geometry.GenericGeometry(network=net, pores=[0, 1, 2, 3])
+        geo2 = op.geometry.GenericGeometry(network=net, pores=[4, 5, 6, 7])
+        geo1['pore.blah'] = 1.0
+        geo2['pore.blah'] = 2.0
+        a = net['pore.blah']
+        # The geometries now hold views into the network array
+        assert sp.shares_memory(a, geo1['pore.blah'])
+        assert sp.shares_memory(a, geo2['pore.blah'])
+        # Subsequent reads return the same array without copying
+        assert net['pore.blah'] is a
+        # Which is read-only, so all writes go through the geometries
+        with pytest.raises(ValueError):
+            a[0] = 5.0
+        # Writing to a geometry produces a new array
+        geo2['pore.blah'] = 3.0
+        b = net['pore.blah']
+        assert b is not a
+        assert sp.all(b == [1, 1, 1, 1, 3, 3, 3, 3])
+        # Non-contiguous locations fall back to copying on each read
+        geo1.drop_locations(pores=[1])
+        geo2.drop_locations(pores=[6])
+        geo1.add_locations(pores=[6])
+        geo2.add_locations(pores=[1])
+        c = net['pore.blah']
+        assert not sp.shares_memory(c, geo1['pore.blah'])
+        assert net['pore.blah'] is not c
+
     def test_interpolate_data(self):
         a = self.geo.interpolate_data(propname='throat.diameter')
         assert a.size == self.geo.Np
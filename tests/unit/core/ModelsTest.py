@@ -151,6 +151,199 @@ class ModelsTest:
         pn.regenerate_models(deep=True)
         assert len(geo.props()) == b
 
+    def test_regenerate_models_skip_clean_models(self):
+        pn = op.network.Cubic(shape=[5, 5, 5])
+        geo = op.geometry.StickAndBall(network=pn, pores=pn.Ps, throats=pn.Ts)
+        phase = op.phases.Water(network=pn)
+        phys = op.physics.Standard(network=pn, phase=phase, geometry=geo)
+        calls = []
+
+        def doubler(target, prop='pore.temperature'):
+            calls.append(prop)
+            return target[prop]*2
+
+        phys.add_model(propname='pore.doubled', model=doubler)
+        phase.settings['skip_clean_models'] = True
+        phys.settings['skip_clean_models'] = True
+        phase.regenerate_models(deep=True)
+        n = len(calls)
+        # Nothing has changed so the model should not be run again
+        phase.regenerate_models(deep=True)
+        assert len(calls) == n
+        # Writing an input on the phase makes the physics model dirty
+        phase['pore.temperature'] = 310.0
+        phase.regenerate_models(deep=True)
+        assert len(calls) == n + 1
+        assert np.all(phys['pore.doubled'] == 620.0)
+        # Changing a parameter also makes the model dirty
+        phys.models['pore.doubled']['prop'] = 'pore.pressure'
+        phys.regenerate_models()
+        assert len(calls) == n + 2
+        # As does deleting the model's data
+        del phys['pore.doubled']
+        phys.regenerate_models()
+        assert len(calls) == n + 3
+        # The default behavior is to always run the models
+        phys.settings['skip_clean_models'] = False
+        phys.regenerate_models()
+        assert len(calls) == n + 4
+
+    def test_execution_plan_reused_until_models_change(self):
+        pn = op.network.Cubic(shape=[3, 3, 3])
+        geo = op.geometry.StickAndBall(network=pn, pores=pn.Ps, throats=pn.Ts)
+        plan = geo.models._get_plan()
+        assert geo.models._get_plan() is plan
+        geo.regenerate_models()
+        assert geo.models._get_plan() is plan
+        assert [step[0] for step in plan] == geo.models.dependency_list()
+        # Changing a parameter rebuilds the plan with the new value
+        geo.models['pore.seed']['num_range'] = [0.5, 0.5]
+        plan = geo.models._get_plan()
+        step = [s for s in plan if s[0] == 'pore.seed'][0]
+        assert step[3]['num_range'] == [0.5, 0.5]
+        geo.regenerate_models()
+        assert np.all(geo['pore.seed'] == 0.5)
+        # Adding or removing models rebuilds the plan
+        geo.add_model(propname='pore.test', model=mods.misc.constant,
+                      value=1.0)
+        assert 'pore.test' in geo.models.dependency_list()
+        geo.remove_model('pore.test')
+        assert 'pore.test' not in geo.models.dependency_list()
+        # The plan is not kept when pickling
+        proj = op.Workspace().copy_project(pn.project)
+        geo2 = proj.geometries()[geo.name]
+        assert not hasattr(geo2.models, '_plan')
+        assert geo2.models.dependency_list() == geo.models.dependency_list()
+
+    def test_lazy_models(self):
+        pn = op.network.Cubic(shape=[3, 3, 3])
+        geo = op.geometry.StickAndBall(network=pn, pores=pn.Ps, throats=pn.Ts)
+        phase = op.phases.Water(network=pn)
+        phys = op.physics.GenericPhysics(network=pn, phase=phase, geometry=geo)
+        calls = []
+
+        def doubler(target, prop):
+            calls.append(prop)
+            return target[prop]*2
+
+        phys.add_model(propname='pore.a', model=doubler,
+                       prop='pore.temperature', regen_mode='lazy')
+        phys.add_model(propname='pore.b', model=doubler, prop='pore.a',
+                       regen_mode='lazy')
+        phys.add_model(propname='pore.c', model=doubler,
+                       prop='pore.temperature', regen_mode='lazy')
+        assert len(calls) == 0
+        # Requesting pore.b from the phase also runs pore.a, but not pore.c
+        assert np.all(phase['pore.b'] == 4*phase['pore.temperature'])
+        assert calls == ['pore.a', 'pore.temperature']
+        assert 'pore.c' not in phys.keys()
+        # The data is reused until models are regenerated
+        phys['pore.b']
+        assert len(calls) == 2
+        phase['pore.temperature'] = 300.0
+        phase.regenerate_models(deep=True)
+        assert 'pore.b' not in phys.keys()
+        assert np.all(phys['pore.b'] == 1200.0)
+        assert len(calls) == 4
+        assert np.all(phys['pore.c'] == 600.0)
+        assert phys.models['pore.c']['regen_mode'] == 'lazy'
+
+    def test_regenerate_models_deep_with_threads(self):
+        ws = op.Workspace()
+        pn = op.network.Cubic(shape=[8, 4, 4])
+        geoms = []
+        for i in range(4):
+            Ps = pn.Ps[i*32:(i+1)*32]
+            Ts = pn.Ts[i::4]
+            geo = op.geometry.GenericGeometry(network=pn, pores=Ps, throats=Ts)
+            geo['pore.diameter'] = np.linspace(0.1, 1.0, geo.Np)*(i+1)
+            geo.add_model(propname='pore.volume',
+                          model=mods.geometry.pore_volume.sphere)
+            geoms.append(geo)
+        expected = pn['pore.volume'].copy()
+        for geo in geoms:
+            geo.clear(mode='model_data')
+        ws.settings['regen_threads'] = 4
+        try:
+            pn.regenerate_models(deep=True)
+            assert np.allclose(pn['pore.volume'], expected)
+
+            # Errors raised on a thread reach the caller
+            def fail(target):
+                raise ValueError('failed')
+            geoms[2].add_model(propname='pore.fail', model=fail,
+                               regen_mode='deferred')
+            with pytest.raises(ValueError):
+                pn.project._regenerate_models()
+        finally:
+            ws.settings['regen_threads'] = None
+
+    def test_memoize_models(self):
+        from openpnm.core.ModelsMixin import _model_cache
+        ws = op.Workspace()
+        _model_cache.clear()
+        pn = op.network.Cubic(shape=[5, 5, 5])
+        geo = op.geometry.StickAndBall(network=pn, pores=pn.Ps, throats=pn.Ts)
+        phase = op.phases.Water(network=pn)
+        phys = op.physics.Standard(network=pn, phase=phase, geometry=geo)
+        calls = []
+
+        def doubler(target, prop='pore.temperature'):
+            calls.append(prop)
+            return target[prop]*2
+
+        phys.settings['memoize_models'] = True
+        phys.add_model(propname='pore.doubled', model=doubler)
+        assert len(calls) == 1
+        # Conductance models read their inputs from the network and phase
+        kwargs = phys.models['throat.hydraulic_conductance'].copy()
+        model = kwargs.pop('model')
+        kwargs.pop('regen_mode')
+        key = phys._memo_key('throat.hydraulic_conductance', model, kwargs)
+        assert key is not None
+        phys.regenerate_models()
+        assert len(calls) == 1
+        g = phys['throat.hydraulic_conductance'].copy()
+        phys.regenerate_models()
+        assert np.all(phys['throat.hydraulic_conductance'] == g)
+        # Writing an input requires the model to be run
+        T = phase['pore.temperature'].copy()
+        T[0] = 350.0
+        phase['pore.temperature'] = T
+        phys.regenerate_models()
+        assert len(calls) == 2
+        assert phys['pore.doubled'][0] == 700.0
+        phys.regenerate_models()
+        assert len(calls) == 2
+        # Writing a sub-key of an input is seen as writing the input
+        key = phys._memo_key('throat.hydraulic_conductance', model, kwargs)
+        geo['throat.conduit_lengths.pore1'] = \
+            geo['throat.conduit_lengths.pore1']
+        assert phys._memo_key('throat.hydraulic_conductance', model,
+                              kwargs) != key
+
+        # Arrays passed directly as arguments are compared by content
+        def scaler(target, values):
+            calls.append('values')
+            return values*2
+
+        phys.add_model(propname='pore.scaled', model=scaler, values=T)
+        phys.models['pore.scaled']['values'] = T.copy()
+        phys.regenerate_models(propnames='pore.scaled')
+        assert len(calls) == 3
+        # Results are discarded when the cache is full
+        ws.settings['model_cache_entries'] = 1
+        try:
+            phase['pore.temperature'] = 300.0
+            phys.regenerate_models(propnames='pore.doubled')
+            assert len(_model_cache) == 1
+            phase['pore.temperature'] = 298.0
+            phys.regenerate_models(propnames='pore.doubled')
+            assert len(calls) == 5
+        finally:
+            ws.settings['model_cache_entries'] = None
+            _model_cache.clear()
+
 
 if __name__ == '__main__':
 
@@ -313,6 +313,48 @@ class ProjectTest:
         b = self.proj[a.name]
         assert a is b
 
+    def test_project_back_reference(self):
+        proj = self.ws.copy_project(self.net.project)
+        assert sp.all([item.project is proj for item in proj])
+        geo1 = proj.geometries()['geo_01']
+        proj.purge_object(geo1)
+        assert geo1.project is None
+        # Purged objects are marked as such instead of searching the
+        # Workspace again
+        assert geo1._project is False
+        assert proj.network.project is proj
+        objs = list(proj)
+        self.ws.close_project(proj)
+        assert sp.all([item.project is None for item in objs])
+
+    def test_lookups_updated_after_membership_changes(self):
+        proj = self.ws.copy_project(self.net.project)
+        net = proj.network
+        phase1 = proj.phases()['phase_01']
+        phys11 = proj.physics()['phys_01']
+        assert proj.find_phase(phys11) is phase1
+        assert len(proj.find_physics(phase=phase1)) == 2
+        # Rename an object and ensure lookups by name are updated
+        phys11.name = 'phys_renamed'
+        assert proj['phys_renamed'] is phys11
+        assert 'phys_renamed' in proj.physics().keys()
+        assert proj.find_phase(phys11) is phase1
+        # Add a new phase and physics and ensure lookups see them
+        phase3 = op.phases.GenericPhase(network=net)
+        geo1 = proj.geometries()['geo_01']
+        phys31 = op.physics.GenericPhysics(network=net, phase=phase3,
+                                           geometry=geo1)
+        assert phase3 in proj.phases().values()
+        assert proj.find_physics(phase=phase3) == [phys31]
+        assert proj.find_physics(geometry=geo1)[-1] is phys31
+        assert proj.find_physics(geometry=geo1, phase=phase3) is phys31
+        assert proj.find_full_domain(phys31) is phase3
+        # Remove the physics and ensure lookups no longer find it
+        proj.purge_object(phys31)
+        assert proj.find_physics(phase=phase3) == []
+        assert proj.find_physics(geometry=geo1)[-1] is None
+        assert phys31.name not in proj.physics().keys()
+
     def test_comments(self):
         proj = self.proj
         proj.comments = 'test comment'
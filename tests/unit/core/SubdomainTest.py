@@ -74,6 +74,36 @@ class SubdomainTest:
         assert self.phase1.num_throats(self.phys1.name) == 0
         self.phys1.add_locations(pores=self.net.Ps, throats=self.net.Ts)
 
+    def test_location_indices_updated_after_changing_locations(self):
+        net = op.network.Cubic(shape=[4, 4, 4])
+        geo1 = op.geometry.GenericGeometry(network=net, pores=net.Ps[:32],
+                                           throats=net.Ts)
+        geo2 = op.geometry.GenericGeometry(network=net, pores=net.Ps[32:])
+        geo1['pore.value'] = 1.0
+        geo2['pore.value'] = 2.0
+        assert sp.all(geo1._get_locations('pore') == net.Ps[:32])
+        assert sp.all(net['pore.value'][:32] == 1.0)
+        # Moving pores between geometries updates the indices
+        geo2.drop_locations(pores=net.Ps[32:40])
+        geo1.add_locations(pores=net.Ps[32:40])
+        assert sp.all(geo1._get_locations('pore') == net.Ps[:40])
+        assert sp.all(geo2._get_locations('pore') == net.Ps[40:])
+        geo1['pore.value'] = 1.0
+        assert sp.all(net['pore.value'][:40] == 1.0)
+        assert sp.all(net['pore.value'][40:] == 2.0)
+        # Trimming pores updates the indices
+        op.topotools.trim(network=net, pores=net.Ps[:8])
+        assert sp.all(geo1._get_locations('pore') == net.Ps[:32])
+        assert sp.all(geo2._get_locations('pore') == net.Ps[32:])
+        assert sp.all(net['pore.value'][:32] == 1.0)
+        # In-place changes are seen once the label array is reassigned
+        net['pore.'+geo1.name][0] = False
+        net['pore.'+geo1.name] = net['pore.'+geo1.name]
+        assert sp.all(geo1._get_locations('pore') == net.Ps[1:32])
+        # Overwriting the label array on the boss is also detected
+        net['pore.'+geo1.name] = False
+        assert len(geo1._get_locations('pore')) == 0
+
 
 if __name__ == '__main__':
 
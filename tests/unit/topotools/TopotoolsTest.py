@@ -165,6 +165,53 @@ class TopotoolsTest:
                                       inlets=Pin, outlets=Pout)
         assert val
 
+    def test_percolation_thresholds(self):
+        np.random.seed(0)
+        net = op.network.Cubic(shape=[10, 10, 1])
+        ij = net['throat.conns']
+        Pin = net.pores('left')
+        t_bond = np.random.rand(net.Nt)
+        t_site = np.random.rand(net.Np)
+        bond = topotools.percolation_thresholds(ij, t_bond, mode='bond',
+                                                inlets=Pin)
+        site = topotools.percolation_thresholds(ij, t_site, mode='site',
+                                                inlets=Pin)
+        free = topotools.percolation_thresholds(ij, t_bond, mode='bond')
+        # Compare with a full percolation at several thresholds
+        for t in np.linspace(0, 1, 11):
+            labels = topotools.bond_percolation(ij, t_bond <= t)
+            assert np.all((free.sites <= t) == (labels.sites >= 0))
+            assert np.all((free.bonds <= t) == (labels.bonds >= 0))
+            labels = topotools.remove_isolated_clusters(labels, inlets=Pin)
+            assert np.all((bond.sites <= t) == (labels.sites >= 0))
+            both = np.all(labels.sites[ij] >= 0, axis=1)
+            assert np.all((bond.bonds <= t) == both)
+            Ts = t_bond <= t
+            assert np.all((bond.bonds <= t)[Ts] == (labels.bonds >= 0)[Ts])
+            labels = topotools.site_percolation(ij, t_site <= t)
+            labels = topotools.remove_isolated_clusters(labels, inlets=Pin)
+            assert np.all((site.sites <= t) == (labels.sites >= 0))
+            assert np.all((site.bonds <= t) == (labels.bonds >= 0))
+        # Bonds are occupied with both of their sites, which may be below
+        # their own threshold
+        assert np.any(bond.bonds < t_bond)
+
+    def test_find_trapped_clusters(self):
+        # A chain of 7 sites with the outlet at the end
+        ij = np.vstack((np.arange(0, 6), np.arange(1, 7))).T
+        am = topotools.conns_to_am(ij)
+        am = am + am.T
+        # Site 5 is invaded early, so sites 2 to 4 are cut off
+        seq = [0, 1, 5, 3, 4, 2, 6]
+        clusters = topotools.find_trapped_clusters(am, sequence=seq,
+                                                   outlets=[6])
+        assert np.all(clusters == [-2, -2, 0, 0, 0, -2, -2])
+        # If site 5 is invaded last nothing is trapped
+        seq = [0, 1, 2, 3, 4, 5, 6]
+        clusters = topotools.find_trapped_clusters(am, sequence=seq,
+                                                   outlets=[6])
+        assert np.all(clusters == -2)
+
     def test_trim_pores(self):
         np.random.seed(1)
         pn = op.network.Cubic(shape=[2, 2, 2], spacing=1)
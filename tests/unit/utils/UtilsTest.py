@@ -1,5 +1,6 @@
 import openpnm as op
 import scipy as sp
+import pickle
 import pytest
 
 
@@ -24,6 +25,85 @@ class UtilsTest:
         t2 = op.utils.toc(quiet=True)
         assert t2 >= 0
 
+    def test_profiler(self, tmpdir):
+        import json
+        import tracemalloc
+        pn = op.network.Cubic(shape=[5, 5, 5])
+        proj = pn.project
+        geo = op.geometry.StickAndBall(network=pn, pores=pn.Ps, throats=pn.Ts)
+        assert len(proj.profiler) == 0  # Nothing recorded by default
+        proj.settings['profile'] = True
+        tracemalloc.start()
+        try:
+            geo.regenerate_models()
+        finally:
+            tracemalloc.stop()
+        water = op.phases.Water(network=pn)
+        phys = op.physics.Standard(network=pn, phase=water, geometry=geo)
+        alg = op.algorithms.StokesFlow(network=pn, phase=water)
+        alg.set_value_BC(pores=pn.pores('left'), values=1)
+        alg.set_value_BC(pores=pn.pores('right'), values=0)
+        alg.run()
+        prof = proj.profiler
+        assert prof[geo.name]['pore.diameter']['calls'] == 1
+        assert prof[geo.name]['pore.diameter']['bytes'] is not None
+        assert prof[phys.name]['throat.hydraulic_conductance']['calls'] == 1
+        assert prof[phys.name]['throat.hydraulic_conductance']['bytes'] is None
+        for label in ['run', '_build_A', '_apply_BCs', '_solve']:
+            assert prof[alg.name][label]['calls'] == 1
+        assert prof[alg.name]['run']['time'] >= \
+            prof[alg.name]['_solve']['time']
+        recs = prof.report()
+        assert recs[0]['time'] >= recs[-1]['time']
+        assert len(prof.__str__().split('\n')) == len(recs) + 4
+        fname = str(tmpdir.join('profile.json'))
+        s = prof.to_json(filename=fname)
+        with open(fname) as f:
+            d = json.load(f)
+        assert d == json.loads(s)
+        assert d[alg.name]['run']['calls'] == 1
+
+    def test_time_series(self, tmpdir):
+        ts = op.utils.TimeSeries(N=4)
+        for i in range(20):
+            ts.append(i/10, sp.ones(4)*i)
+        assert len(ts) == 20
+        assert ts.data.shape == (20, 4)
+        assert sp.all(ts.at(1.5) == 15)
+        assert sp.all(ts.history([3, 0])[:, 0] == sp.arange(20))
+        with pytest.raises(KeyError):
+            ts.at(2.05)
+        with pytest.raises(Exception):
+            ts.append(2.0, sp.ones(3))
+        # Snapshots can be streamed to disk only and reopened
+        fname = str(tmpdir.join('series.hdf5'))
+        ts = op.utils.TimeSeries(N=4, dtype='float32', filename=fname,
+                                 compression='gzip', in_memory=False)
+        ts.append(0.0, sp.zeros(4))
+        ts.append(0.5, sp.arange(4))
+        assert ts.data.dtype == sp.float32
+        assert sp.all(ts.history([3, 1]) == [[0, 0], [3, 1]])
+        ts.close()
+        ts = op.utils.TimeSeries(N=4, filename=fname)
+        ts.append(1.0, sp.ones(4))
+        ts.set_state(x=sp.ones(4), t=1.0)
+        assert sp.all(ts.times == [0, 0.5, 1.0])
+        assert sp.all(ts.at(0.5) == sp.arange(4))
+        ts.close()
+        ts = op.utils.TimeSeries(N=4, filename=fname)
+        assert ts.get_state()['t'] == 1.0
+        # The open file is not pickled, but reopened by the copy
+        ts2 = pickle.loads(pickle.dumps(ts))
+        assert sp.all(ts2.at(0.5) == sp.arange(4))
+        ts.close()
+        ts2.append(1.5, sp.ones(4))
+        assert ts2.get_state()['t'] == 1.0
+        ts2.close()
+        ts = op.utils.TimeSeries(N=4, filename=fname, overwrite=True)
+        assert len(ts) == 0
+        assert ts.get_state() == {}
+        ts.close()
+
     def test_nested_dict(self):
         d = op.utils.NestedDict()
         d['top']['middle']['bottom'] = 1